@@ -0,0 +1,211 @@
+import os
+import json
+import warnings
+import argparse
+import numpy as np
+import pandas as pd
+from contest_store import CSV_DIR, open_store
+from problem_cells import problem_columns, decode_contest
+from csv_schema import read_contest
+from instrument import span
+
+ANALYTICS_DIR = 'analytics'
+ANALYTICS_VERSION = 2
+TABLES = ['problems', 'attempts', 'schools']
+MEDALS = {
+    'Gold': 'gold', '金奖': 'gold',
+    'Silver': 'silver', '银奖': 'silver',
+    'Bronze': 'bronze', '铜奖': 'bronze',
+    'Honorable': 'honorable', 'HM': 'honorable',
+}
+MEDAL_KINDS = ['gold', 'silver', 'bronze', 'honorable']
+
+def contest_tables(store, contest, df):
+    '''
+    由一场比赛的 CSV 与比赛存储中的行计算聚合表
+    problems: 每题一行，参赛队数、尝试/通过队数、通过率、首次通过及通过时间中位数（分钟）、提交数
+    attempts: 每题按 (提交次数, 是否通过) 统计的队伍数
+    schools:  每个学校一行，参赛队数、最好名次及其百分位、各类奖牌数
+    '''
+    info = store.info(contest)
+    base = {'contest': contest, 'season': info['season'], 'type': info['type'], 'city': info['city']}
+    rows = store.contest(contest)
+    teams = len(df)
+    # 题目列必须按字符串读取（如 read_contest）：pandas 会把只含 -k 的列推断为数值，解码时未通过的尝试被当作空单元格
+    numeric = [c for c in problem_columns(df.columns) if pd.api.types.is_numeric_dtype(df[c])]
+    assert not numeric, f"{contest}: 题目列 {', '.join(numeric)} 未按字符串读取"
+
+    problems, cells = decode_contest(df)
+    tried = ~cells['blank'] & (cells['attempts'] > 0)
+    accepted = cells['accepted']
+    minutes = np.where(accepted, cells['minutes'], np.nan).astype(np.float64)
+    solved = accepted.sum(axis=0)
+    with warnings.catch_warnings():
+        # 无人通过的题目首次通过时间为 NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        first_solve = np.nanmin(minutes, axis=0) if teams else np.full(len(problems), np.nan)
+        median_solve = np.nanmedian(minutes, axis=0) if teams else np.full(len(problems), np.nan)
+    problem_table = pd.DataFrame(dict(base,
+        problem=problems,
+        teams=teams,
+        tried=tried.sum(axis=0),
+        accepted=solved,
+        solve_rate=solved / teams if teams else np.nan,
+        first_solve=first_solve,
+        median_solve=median_solve,
+        submissions=np.where(tried, cells['attempts'], 0).sum(axis=0),
+    ), index=range(len(problems)))
+
+    # 尝试过的 (题目, 提交次数, 是否通过) 组合及队伍数
+    j = np.nonzero(tried)[1]
+    combos, counts = np.unique(np.stack([j, cells['attempts'][tried], accepted[tried]], axis=1),
+                               axis=0, return_counts=True) if len(j) else (np.empty((0, 3), dtype=np.int64), [])
+    attempt_table = pd.DataFrame(dict(base,
+        problem=[problems[k] for k in combos[:, 0]],
+        attempts=combos[:, 1].astype(np.int64),
+        accepted=combos[:, 2].astype(bool),
+        teams=np.asarray(counts, dtype=np.int64),
+    ), index=range(len(combos)))
+
+    school_table = pd.DataFrame()
+    if 'School' in info['columns']:
+        frame = pd.DataFrame({'school': rows['school'].to_numpy(),
+                              'rank': rows['rank'].where(rows['rank'] > 0).to_numpy()})
+        medal = df['Medal'].map(MEDALS) if 'Medal' in df.columns else pd.Series(np.nan, index=df.index)
+        medal = medal.reindex(rows['row']).to_numpy()
+        for m in MEDAL_KINDS:
+            frame[m] = (medal == m).astype(np.int64)
+        frame = frame[frame['school'].notna()]
+        ranked = int((rows['rank'] > 0).sum())
+        school_table = frame.groupby('school', sort=False).agg(
+            teams=('school', 'size'), best_rank=('rank', 'min'), **{m: (m, 'sum') for m in MEDAL_KINDS}
+        ).reset_index()
+        # 百分位 = (有名次的队伍数 - 最好名次 + 1) / 有名次的队伍数，第一名为 100
+        school_table.insert(3, 'percentile', 100 * (ranked - school_table['best_rank'] + 1) / ranked)
+        for k, v in reversed(base.items()):
+            school_table.insert(0, k, v)
+    return {'problems': problem_table, 'attempts': attempt_table, 'schools': school_table}
+
+def table_path(table, analytics_dir=ANALYTICS_DIR):
+    return os.path.join(analytics_dir, f'{table}.parquet')
+
+def load_tables(analytics_dir=ANALYTICS_DIR):
+    '''读取已缓存的聚合表，返回 (meta, {table: DataFrame})；缓存不存在或版本不符时返回 (None, {})'''
+    try:
+        with open(os.path.join(analytics_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['version'] != ANALYTICS_VERSION:
+            return None, {}
+        return meta, {t: pd.read_parquet(table_path(t, analytics_dir)) for t in TABLES}
+    except Exception:
+        return None, {}
+
+def build_analytics(store=None, csv_dir=CSV_DIR, analytics_dir=ANALYTICS_DIR):
+    '''
+    更新聚合表：比赛存储中内容（或 school.csv）变化的比赛重新读取 CSV 计算，其余比赛沿用缓存
+    返回 {table: DataFrame}
+    '''
+    store = store or open_store(csv_dir)
+    key = {c: [store.info(c)['hash'], store.meta['school_key']] for c in store.contests}
+    meta, tables = load_tables(analytics_dir)
+    cached = meta['contests'] if meta is not None else {}
+    if cached == key:
+        return tables
+
+    stale = [c for c in store.contests if cached.get(c) != key[c]]
+    parts = {t: [] for t in TABLES}
+    for t in TABLES:
+        if t in tables and len(tables[t]):
+            parts[t].append(tables[t][tables[t]['contest'].isin(set(key) - set(stale))])
+    for contest in stale:
+        with span('analytics_contest', contest=contest) as s:
+            # 按比赛存储中记录的 schema 只读取题目列和奖牌列
+            info = store.info(contest)
+            usecols = [c for c, kind in info['schema'].items() if kind == 'cell'] + ['Medal']
+            df = read_contest(os.path.join(csv_dir, f'{contest}.csv'), info['schema'], usecols, info['rejected'])
+            for t, frame in contest_tables(store, contest, df).items():
+                parts[t].append(frame)
+            s.rows = len(df)
+
+    # 按比赛存储中的顺序排列
+    order = {c: i for i, c in enumerate(store.contests)}
+    tables = {}
+    for t in TABLES:
+        frames = [frame for frame in parts[t] if len(frame)]
+        frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame({'contest': []})
+        tables[t] = frame.sort_values('contest', key=lambda c: c.map(order), kind='stable', ignore_index=True)
+
+    os.makedirs(analytics_dir, exist_ok=True)
+    for t in TABLES:
+        tmp_path = table_path(t, analytics_dir) + '.tmp'
+        tables[t].to_parquet(tmp_path, index=False, engine='pyarrow', compression='zstd')
+        os.replace(tmp_path, table_path(t, analytics_dir))
+    tmp_path = os.path.join(analytics_dir, 'meta.tmp.json')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': ANALYTICS_VERSION, 'contests': key}, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(analytics_dir, 'meta.json'))
+    return tables
+
+def open_analytics(csv_dir=CSV_DIR, analytics_dir=ANALYTICS_DIR):
+    '''打开聚合表，csv_dir 有变化时先增量更新'''
+    return build_analytics(None, csv_dir, analytics_dir)
+
+def select(frame, contest_type=None, season=None):
+    if contest_type is not None:
+        frame = frame[frame['type'] == contest_type]
+    if season is not None:
+        frame = frame[frame['season'] == season]
+    return frame
+
+def first_solves(tables, contest_type=None, season=None):
+    '''各比赛各题的首次通过时间（分钟）宽表，行为比赛，列为题目'''
+    problems = select(tables['problems'], contest_type, season)
+    return problems.pivot(index='contest', columns='problem', values='first_solve').reindex(problems['contest'].unique())
+
+def solve_rates(tables, contest_type=None, season=None):
+    '''按比赛汇总：题数、平均通过率、最难题和最简单题的通过率'''
+    problems = select(tables['problems'], contest_type, season)
+    return problems.groupby('contest', sort=False).agg(
+        problems=('problem', 'size'),
+        mean_rate=('solve_rate', 'mean'),
+        min_rate=('solve_rate', 'min'),
+        max_rate=('solve_rate', 'max'),
+    )
+
+def attempt_distribution(tables, contest_type=None, season=None, accepted=True):
+    '''所有题目合计的提交次数分布：{提交次数: 队伍数}，accepted 为 True 时只统计最终通过的'''
+    attempts = select(tables['attempts'], contest_type, season)
+    attempts = attempts[attempts['accepted'] == accepted]
+    return attempts.groupby('attempts')['teams'].sum()
+
+def school_medals(tables, school, contest_type=None):
+    '''学校每个赛季的奖牌数'''
+    schools = select(tables['schools'], contest_type)
+    schools = schools[schools['school'] == school]
+    return schools.groupby(['type', 'season'])[MEDAL_KINDS].sum()
+
+def school_percentiles(tables, school, contest_type=None):
+    '''学校每场比赛的最好名次及百分位，按比赛顺序排列'''
+    schools = select(tables['schools'], contest_type)
+    return schools[schools['school'] == school][['contest', 'teams', 'best_rank', 'percentile']].reset_index(drop=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='跨比赛的题目与学校统计（聚合表缓存于 analytics/）')
+    parser.add_argument('--type', choices=['ICPC', 'CCPC'], default=None, help='只统计某类比赛')
+    parser.add_argument('--season', type=int, default=None, help='只统计某一届')
+    parser.add_argument('--school', help='学校每个赛季的奖牌数及每场比赛的百分位')
+    parser.add_argument('--first-solve', action='store_true', help='各比赛各题的首次通过时间')
+    parser.add_argument('--attempts', action='store_true', help='通过的题目的提交次数分布')
+    args = parser.parse_args()
+
+    tables = open_analytics()
+    with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', 200):
+        if args.school:
+            print(school_medals(tables, args.school, args.type))
+            print(school_percentiles(tables, args.school, args.type))
+        elif args.first_solve:
+            print(first_solves(tables, args.type, args.season))
+        elif args.attempts:
+            print(attempt_distribution(tables, args.type, args.season))
+        else:
+            print(solve_rates(tables, args.type, args.season))
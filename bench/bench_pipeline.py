@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import time
+import runpy
+import shutil
+import argparse
+import platform
+import tempfile
+import cProfile
+import contextlib
+import subprocess
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'rating'))
+
+import numpy as np
+import pandas as pd
+
+STAGES = ['convert', 'rl_cells', 'contest_store', 'school_scan', 'contest_ranks', 'calculate_rating', 'rating_replay', 'readme']
+# 只依赖 org/ 的阶段不随数据规模变化
+SCALED_STAGES = ['contest_store', 'school_scan', 'contest_ranks', 'calculate_rating', 'rating_replay', 'readme']
+
+@contextlib.contextmanager
+def chdir(path):
+    cwd = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+def run_script(path, *args):
+    '''在当前进程中运行脚本，丢弃其输出'''
+    argv = sys.argv
+    sys.argv = [path] + list(args)
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            runpy.run_path(path, run_name='__main__')
+    finally:
+        sys.argv = argv
+
+def make_workspace(scale):
+    '''
+    构造一个独立的工作目录，csv/ 与 date.csv 复制 scale 份
+    第 k 份的比赛名为 {season}_{type}_{city}{k}，日期后移 k*10 年
+    '''
+    workspace = tempfile.mkdtemp(prefix=f'xcpc-bench-x{scale}-')
+    os.makedirs(os.path.join(workspace, 'csv'))
+    os.makedirs(os.path.join(workspace, 'rating'))
+    shutil.copy(os.path.join(ROOT, 'school.csv'), workspace)
+    csv_dir = os.path.join(ROOT, 'csv')
+    files = sorted(f for f in os.listdir(csv_dir) if f.endswith('.csv'))
+    dates = pd.read_csv(os.path.join(ROOT, 'date.csv'), dtype=str)
+    rows = []
+    for k in range(scale):
+        suffix = str(k) if k else ''
+        for file in files:
+            os.symlink(os.path.join(csv_dir, file), os.path.join(workspace, 'csv', f'{file[:-4]}{suffix}.csv'))
+        for contest, date in zip(dates['contest'], dates['date']):
+            if isinstance(date, str) and date:
+                date = datetime.strptime(date, '%Y/%m/%d') + timedelta(days=3653 * k)
+                date = f'{date.year}/{date.month}/{date.day}'
+            else:
+                date = ''
+            rows.append((f'{contest}{suffix}', date))
+    pd.DataFrame(rows, columns=['contest', 'date']).to_csv(os.path.join(workspace, 'date.csv'), index=False)
+    return workspace
+
+def bench_convert(scratch):
+    from convert import parse, export_formal_team_to_csv
+    org = os.path.join(ROOT, 'org')
+    count = 0
+    for file in sorted(os.listdir(org)):
+        if not file.endswith('.xlsx'):
+            continue
+        try:
+            year, xcpc, city = parse(file)
+            export_formal_team_to_csv(os.path.join(org, file), os.path.join(scratch, f'{year}_{xcpc}_{city}.csv'))
+            count += 1
+        except Exception:
+            pass
+    return {'files': count}
+
+def load_rl_sheets():
+    '''读取 RankLand 导出的 Official 工作表，并按 rl.py 的规则清理列名'''
+    from problem_cells import problem_columns
+    org = os.path.join(ROOT, 'org')
+    frames = []
+    for file in sorted(os.listdir(org)):
+        if file.startswith('icpc2017') and file.endswith('.xlsx'):
+            df = pd.read_excel(os.path.join(org, file), sheet_name='Official')
+            df.columns = [col.split('(')[0].strip() if '(' in col else col for col in df.columns]
+            frames.append(df[problem_columns(df.columns, last='M')])
+    return frames
+
+def bench_rl_cells(frames):
+    from problem_cells import convert_rl_cells
+    for frame in frames:
+        convert_rl_cells(frame)
+    return {'cells': int(sum(frame.size for frame in frames))}
+
+def bench_contest_store():
+    from contest_store import build_store
+    store = build_store()
+    return {'contests': len(store.contests), 'rows': int(len(store.columns['contest']))}
+
+def bench_contest_ranks():
+    '''所有比赛各类实体的排名（一次批量计算）'''
+    from contest_store import open_store
+    from rating_ranks import store_entity_ranks
+    store = open_store()
+    ranks = store_entity_ranks(store, store.contests, ['school', 'team', 'member'])
+    return {'contests': len(ranks), 'ranks': sum(len(r[0]) for e in ranks.values() for r in e.values())}
+
+def bench_calculate_rating():
+    '''按 rating_school.py 的顺序重放，只统计 calculateRatingArray 本身的耗时'''
+    from contest_store import open_store
+    from rating_school import load_contest_order
+    from rating_ranks import store_entity_ranks
+    from rating_utils import RatingState, calculateRatingArray
+    store = open_store()
+    contests = [c for c in load_contest_order()
+                if c in store.contest_ids and 'School' in store.info(c)['columns']]
+    contest_ranks = store_entity_ranks(store, contests, ['school'])
+    state = RatingState()
+    times = []
+    for contest in contests:
+        keys, rank = contest_ranks[contest]['school']
+        ids = state.intern(keys)
+        start = time.perf_counter()
+        state.ratings[ids] = calculateRatingArray(rank, state.ratings[ids])
+        times.append(time.perf_counter() - start)
+    times = np.array(times)
+    return {
+        'contests': len(times),
+        'schools': len(state.table),
+        'rating_seconds': float(times.sum()),
+        'per_contest_mean': float(times.mean()) if len(times) else 0.0,
+        'per_contest_max': float(times.max()) if len(times) else 0.0,
+    }
+
+def run_stage(stage, scale, context, profile_dir):
+    funcs = {
+        'convert': lambda: bench_convert(context['scratch']),
+        'rl_cells': lambda: bench_rl_cells(context['rl_frames']),
+        'contest_store': bench_contest_store,
+        'school_scan': lambda: run_script(os.path.join(ROOT, 'school.py')),
+        'contest_ranks': bench_contest_ranks,
+        'calculate_rating': bench_calculate_rating,
+        'rating_replay': lambda: run_script(os.path.join(ROOT, 'rating', 'rating_school.py'), '--full'),
+        'readme': lambda: run_script(os.path.join(ROOT, 'readme.py')),
+    }
+    profiler = cProfile.Profile() if profile_dir else None
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    info = funcs[stage]()
+    if profiler:
+        profiler.disable()
+    seconds = time.perf_counter() - start
+    if profiler:
+        profiler.dump_stats(os.path.join(profile_dir, f'{stage}_x{scale}.prof'))
+    return {'stage': stage, 'scale': scale, 'seconds': seconds, **(info or {})}
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+def compare(results, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['stage'], r['scale']): r['seconds'] for r in json.load(f)['results']}
+    print(f"\n与 {baseline_path} 比较:")
+    for r in results:
+        base = baseline.get((r['stage'], r['scale']))
+        if base:
+            print(f"  {r['stage']:<18} x{r['scale']:<5} {base:>9.3f}s -> {r['seconds']:>9.3f}s  ({r['seconds'] / base:.2f}x)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='数据处理各阶段的基准测试')
+    parser.add_argument('--stages', default=','.join(STAGES), help='要运行的阶段，逗号分隔')
+    parser.add_argument('--scales', default='1,10,100', help='数据规模（比赛数量的倍数），逗号分隔')
+    parser.add_argument('--repeat', type=int, default=1, help='每个阶段重复次数，取最短时间')
+    parser.add_argument('--output', default=None, help='结果 JSON 路径（默认 bench/results/<时间>.json）')
+    parser.add_argument('--profile', default=None, help='保存 cProfile 结果的目录')
+    parser.add_argument('--compare', default=None, help='与之前的结果 JSON 比较')
+    parser.add_argument('--keep', action='store_true', help='保留临时工作目录')
+    args = parser.parse_args()
+
+    stages = [s for s in args.stages.split(',') if s]
+    scales = [int(s) for s in args.scales.split(',') if s]
+    unknown = set(stages) - set(STAGES)
+    assert not unknown, f"未知的阶段: {', '.join(sorted(unknown))}"
+    if args.profile:
+        os.makedirs(args.profile, exist_ok=True)
+
+    context = {'scratch': tempfile.mkdtemp(prefix='xcpc-bench-convert-')}
+    if 'rl_cells' in stages:
+        context['rl_frames'] = load_rl_sheets()
+
+    results = []
+    for scale in scales:
+        workspace = make_workspace(scale)
+        try:
+            with chdir(workspace):
+                if 'contest_store' not in stages:
+                    # 其他阶段都基于已建好的比赛存储
+                    bench_contest_store()
+                for stage in stages:
+                    if scale != scales[0] and stage not in SCALED_STAGES:
+                        continue
+                    runs = [run_stage(stage, scale, context, args.profile) for _ in range(args.repeat)]
+                    result = min(runs, key=lambda r: r['seconds'])
+                    results.append(result)
+                    extra = ', '.join(f'{k}={v:.4g}' if isinstance(v, float) else f'{k}={v}'
+                                      for k, v in result.items() if k not in ('stage', 'scale', 'seconds'))
+                    print(f"{stage:<18} x{scale:<5} {result['seconds']:>9.3f}s  {extra}")
+        finally:
+            if not args.keep:
+                shutil.rmtree(workspace, ignore_errors=True)
+    shutil.rmtree(context['scratch'], ignore_errors=True)
+
+    output = args.output or os.path.join(ROOT, 'bench', 'results', datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    meta = {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存到 {output}")
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from qoj import standings_html_to_csv, iter_standings
+
+def measure(func):
+    '''返回 (结果, 耗时秒, 峰值内存字节)；tracemalloc 会拖慢运行，因此计时与内存分两次测量'''
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def run_tree(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        df = standings_html_to_csv(f.read())
+    return [list(df.columns)] + df.values.tolist()
+
+def run_stream(path):
+    # 逐行消费，不保留结果，只统计行数
+    count = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in iter_standings(f):
+            count += 1
+    return count
+
+# 流式解析的结果不应依赖 feed() 的块大小，块边界可能落在任意文本或标签中间
+CHUNK_SIZES = [1, 7, 100, 4096, 1 << 16]
+
+def check_chunks(path, rows):
+    for chunk_size in CHUNK_SIZES:
+        with open(path, 'r', encoding='utf-8') as f:
+            assert list(iter_standings(f, chunk_size)) == rows, f"流式解析结果不一致: {path} (chunk_size={chunk_size})"
+
+def scaled_page(path, factor):
+    '''将表格中的数据行重复 factor 次，构造更大的页面'''
+    with open(path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    start = html.index('<table class="standings">')
+    header_end = html.index('</tr>', start) + len('</tr>')
+    end = html.find('</table>', header_end)
+    if end < 0:
+        # 页面可能在表格中途截断
+        end = len(html)
+    return html[:header_end] + html[header_end:end] * factor + html[end:]
+
+if __name__ == '__main__':
+    org = os.path.join(ROOT, 'org')
+    files = sorted(f for f in os.listdir(org) if f.endswith('.htm'))
+    print(f"{'file':<24}{'size':>10}{'tree s':>10}{'tree MB':>10}{'stream s':>10}{'stream MB':>11}")
+    for file in files:
+        path = os.path.join(org, file)
+        rows, tree_time, tree_peak = measure(lambda: run_tree(path))
+        count, stream_time, stream_peak = measure(lambda: run_stream(path))
+        check_chunks(path, rows)
+        print(f"{file:<24}{os.path.getsize(path):>10}{tree_time:>10.3f}{tree_peak / 2**20:>10.1f}"
+              f"{stream_time:>10.3f}{stream_peak / 2**20:>11.1f}")
+
+    # 放大页面，流式解析的峰值内存应保持不变
+    factor = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    html = scaled_page(os.path.join(org, files[0]), factor)
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.htm', delete=False) as tmp:
+        tmp.write(html)
+    size = os.path.getsize(tmp.name)
+    del html
+    try:
+        count, elapsed, peak = measure(lambda: run_stream(tmp.name))
+    finally:
+        os.remove(tmp.name)
+    print(f"{files[0]} x{factor}: {size / 2**20:.1f} MB, {count} 行, stream {elapsed:.3f} s, 峰值 {peak / 2**20:.1f} MB")
@@ -0,0 +1,85 @@
+import os
+import pickle
+import hashlib
+
+SCHOOL_CSV = 'school.csv'
+DATE_CSV = 'date.csv'
+CSV_DIR = 'csv'
+BUNDLE_PATH = 'cli_bundle.pkl'
+BUNDLE_VERSION = 1
+# 轻量子命令用到的比赛元数据
+INFO_KEYS = ['columns', 'school_has_chinese', 'members_has_chinese', 'errors']
+
+def bundle_key(school_path=SCHOOL_CSV, date_path=DATE_CSV, csv_dir=CSV_DIR):
+    '''school.csv、date.csv 的内容及 csv_dir 下各文件的 (修改时间, 大小)，与比赛存储判断文件变化的方式一致'''
+    digests = []
+    for path in (school_path, date_path):
+        with open(path, 'rb') as f:
+            digests.append(hashlib.sha1(f.read()).hexdigest())
+    stats = []
+    for filename in sorted(os.listdir(csv_dir)):
+        if filename.endswith('.csv'):
+            st = os.stat(os.path.join(csv_dir, filename))
+            stats.append((filename, st.st_mtime_ns, st.st_size))
+    return [BUNDLE_VERSION, *digests, hashlib.sha1(repr(stats).encode('utf-8')).hexdigest()]
+
+def build_bundle(school_path=SCHOOL_CSV, date_path=DATE_CSV, csv_dir=CSV_DIR, bundle_path=BUNDLE_PATH):
+    '''
+    由别名索引、比赛目录和比赛存储生成 CLI 使用的数据包
+    index: 别名索引；catalog/catalog_errors: 比赛目录；contests: {比赛: INFO_KEYS 对应的元数据}；
+    unknown_schools: 别名索引中没有的学校名及其出现位置（school.unknown_schools 的结果）
+    '''
+    # 只有数据包过期时才需要比赛存储（numpy/pandas）及别名索引、比赛目录的构建
+    from school_resolver import load_index
+    from contest_meta import load_catalog
+    from contest_store import open_store
+    from school import unknown_schools
+    key = bundle_key(school_path, date_path, csv_dir)
+    index = load_index(school_path)
+    store = open_store(csv_dir)
+    catalog, errors = load_catalog(date_path, csv_dir)
+
+    contests, schools = {}, {}
+    for contest in store.contests:
+        info = store.info(contest)
+        contests[contest] = {k: info.get(k) for k in INFO_KEYS}
+        if 'School' in info['columns']:
+            i = store.contest_ids[contest]
+            rows = slice(store.contest_offsets[i], store.contest_offsets[i + 1])
+            for row, name_id in zip(store.columns['row'][rows].tolist(), store.columns['name_id'][rows].tolist()):
+                name = store.names[name_id] if name_id >= 0 else None
+                schools.setdefault(name, []).append((f'{contest}.csv', row))
+
+    bundle = {
+        'key': key,
+        'index': {k: index[k] for k in ('zh_en', 'en_zh', 'alt_zh')},
+        'catalog': catalog,
+        'catalog_errors': errors,
+        'contests': contests,
+        'unknown_schools': unknown_schools(index, schools),
+    }
+    if bundle_path is not None:
+        tmp_path = bundle_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, bundle_path)
+    return bundle
+
+def load_bundle(school_path=SCHOOL_CSV, date_path=DATE_CSV, csv_dir=CSV_DIR, bundle_path=BUNDLE_PATH):
+    '''
+    读取 CLI 数据包，输入未变化时只需一次 pickle.load，不导入 numpy/pandas；否则重新生成
+    '''
+    key = bundle_key(school_path, date_path, csv_dir)
+    if bundle_path is not None and os.path.exists(bundle_path):
+        try:
+            with open(bundle_path, 'rb') as f:
+                bundle = pickle.load(f)
+            if bundle['key'] == key:
+                return bundle
+        except Exception:
+            pass
+    return build_bundle(school_path, date_path, csv_dir, bundle_path)
+
+if __name__ == '__main__':
+    bundle = build_bundle()
+    print(f"数据包已生成: {len(bundle['contests'])} 场比赛, {len(bundle['unknown_schools'])} 个未收录的学校名 -> {BUNDLE_PATH}")
@@ -0,0 +1,220 @@
+import os
+import re
+import csv
+import json
+import hashlib
+from datetime import datetime
+
+DATE_CSV = 'date.csv'
+CSV_DIR = 'csv'
+CATALOG_PATH = 'contest_catalog.json'
+CATALOG_VERSION = 1
+FINALS = ['ECFinal', '总决赛']
+
+# 规范的比赛名：{届数}_{ICPC|CCPC}_{城市}
+CONTEST_PATTERN = re.compile(r'(?P<season>\d+)_(?P<type>ICPC|CCPC)_(?P<city>.+)')
+
+# 原始榜单文件名的语法，按顺序尝试
+ICPC_PATTERN = re.compile(r'ICPC|International|国际')
+CCPC_PATTERN = re.compile(r'CCPC|中国')
+SEASON_PATTERN = re.compile(r'第\s*(\d+)\s*[届屆]')
+ORDINAL_PATTERN = re.compile(r'(\d+)th')
+YEAR_PATTERNS = [re.compile(r'202\d'), re.compile(r'201\d')]
+CITY_PATTERNS = [
+    (re.compile(r'赛([^赛站]*)站'), None),
+    (re.compile(r'澳門|macau', re.IGNORECASE), '澳门'),
+    (re.compile(r'Yinchuan'), '银川'),
+    (re.compile(r'决赛'), 'final'),
+    (re.compile(r'East.*Final|Final.*East'), 'ECFinal'),
+]
+# 届数与年份的换算：第 n 届 ICPC 在 1975+n 年，第 n 届 CCPC 在 2014+n 年
+YEAR_OFFSETS = {'ICPC': 1975, 'CCPC': 2014}
+
+# RankLand 导出的榜单文件名：{icpc|ccpc}{年份}{城市拼音}，如 icpc2017beijing.xlsx
+RL_PATTERN = re.compile(r'(?P<type>icpc|ccpc)(?P<year>\d{4})(?P<city>[a-z_]+)')
+RL_CITIES = {
+    'beijing': '北京',
+    'nanning': '南宁',
+    'shenyang': '沈阳',
+    'urumchi': '乌鲁木齐',
+    'xi_an': '西安',
+}
+
+def parse_name(name):
+    '''解析规范的比赛名，返回 (season, type, city)，不符合格式时返回 None'''
+    match = CONTEST_PATTERN.fullmatch(name)
+    if match is None:
+        return None
+    return int(match['season']), match['type'], match['city']
+
+def parse_names(names):
+    '''批量解析比赛名，返回 {name: (season, type, city)}，不符合格式的名称不出现在结果中'''
+    result = {}
+    for name in names:
+        parsed = parse_name(name)
+        if parsed is not None:
+            result[name] = parsed
+    return result
+
+def parse_filename(name):
+    '''
+    由原始榜单文件名解析 (season, type, city)
+    已是规范名称（如 3_CCPC_哈尔滨.xlsx）时直接使用；无法解析时抛出 AssertionError
+    '''
+    parsed = parse_name(os.path.splitext(name)[0])
+    if parsed is not None:
+        return parsed
+
+    xcpc = 'ICPC' if ICPC_PATTERN.search(name) else 'CCPC' if CCPC_PATTERN.search(name) else None
+    assert xcpc is not None, f"无法解析竞赛类型: {name}"
+
+    year = None
+    match = SEASON_PATTERN.search(name) or ORDINAL_PATTERN.search(name)
+    if match is not None:
+        year = int(match[1])
+    else:
+        for pattern in YEAR_PATTERNS:
+            match = pattern.search(name)
+            if match is not None:
+                year = int(match[0]) - YEAR_OFFSETS[xcpc]
+                break
+    assert year is not None, f"无法解析年份: {name}"
+
+    city = None
+    for pattern, value in CITY_PATTERNS:
+        match = pattern.search(name)
+        if match is not None:
+            if value is None:
+                city = match[1].strip()
+            elif value == 'final':
+                city = '总决赛' if xcpc == 'CCPC' else 'ECFinal'
+            else:
+                city = value
+            break
+    assert city is not None, f"无法解析城市: {name}"
+
+    return year, xcpc, city
+
+def parse_rl_filename(name):
+    '''由 RankLand 榜单文件名解析 (season, type, city)；无法解析时抛出 AssertionError'''
+    match = RL_PATTERN.fullmatch(os.path.splitext(name)[0])
+    assert match is not None, f"无法解析 RankLand 榜单文件名: {name}"
+    xcpc = match['type'].upper()
+    city = RL_CITIES.get(match['city'])
+    assert city is not None, f"未知的城市: {match['city']}（请添加到 RL_CITIES）"
+    return int(match['year']) - YEAR_OFFSETS[xcpc], xcpc, city
+
+def contest_sort_key(item):
+    '''README 表格的顺序：ICPC 在前，按届数、日期排序，总决赛排在同届最后'''
+    # 类型权重: ICPC 优先于 CCPC
+    type_weight = 0 if item['type'] == 'ICPC' else 1
+
+    # 是否总决赛标识
+    is_final = 1 if item['city'] in FINALS else 0
+
+    # 日期存在标识
+    has_date_val = 0 if item['date'] is not None else 1
+
+    # 日期值或替代值
+    date_val = item['date'] or datetime.max
+
+    # 城市排序值
+    city_val = item['city'] if not is_final else "zzz_" + item['city']
+
+    return (
+        type_weight,         # 类型优先级
+        item['season'],      # 赛季数字
+        has_date_val,        # 日期存在标志
+        date_val,            # 实际日期值
+        is_final,            # 是否总决赛
+        city_val             # 城市名
+    )
+
+def rating_order(catalog):
+    '''rating 计算的比赛顺序：date.csv 中的比赛按日期排序，同一天 CCPC 在前，没有日期的比赛在最后'''
+    entries = sorted((c for c in catalog if c['order'] is not None),
+                     key=lambda c: (c['date'] is None, c['date'] or datetime.max, c['type'] != 'CCPC', c['order']))
+    return [c['name'] for c in entries]
+
+def build_catalog(date_path=DATE_CSV, csv_dir=CSV_DIR):
+    '''
+    由 date.csv 和 csv_dir 下的文件名构建比赛目录，按 contest_sort_key 排序
+    返回 (目录, 错误列表)；目录每项为 {name, season, type, city, date, has_csv, order}，
+    order 为在 date.csv 中的行号（不在 date.csv 中的比赛为 None）
+    '''
+    errors = []
+    dates, order = {}, {}
+    with open(date_path, 'r', encoding='utf-8') as f:
+        for line, row in enumerate(csv.DictReader(f), 2):
+            contest = row['contest']
+            if contest in order:
+                errors.append(f"{date_path}:{line}: 比赛重复: {contest}")
+                continue
+            order[contest] = len(order)
+            dates[contest] = None
+            if row['date']:
+                try:
+                    dates[contest] = datetime.strptime(row['date'], '%Y/%m/%d')
+                except ValueError:
+                    errors.append(f"{date_path}:{line}: 无法解析日期: {row['date']}")
+
+    files = {f[:-4] for f in os.listdir(csv_dir) if f.endswith('.csv')} if os.path.isdir(csv_dir) else set()
+    # 与 readme.py 一致：没有日期的比赛只有存在 csv 时才列出
+    names = {c for c in dates if dates[c] is not None} | files
+    parsed = parse_names(names)
+    for name in sorted(names - set(parsed)):
+        errors.append(f"比赛名不符合 {{届数}}_{{ICPC|CCPC}}_{{城市}} 格式: {name}")
+    for name in sorted(files - set(dates)):
+        errors.append(f"{date_path} 中缺少比赛: {name}")
+
+    catalog = []
+    for name, (season, contest_type, city) in parsed.items():
+        catalog.append({
+            'name': name,
+            'season': season,
+            'type': contest_type,
+            'city': city,
+            'date': dates.get(name),
+            'has_csv': name in files,
+            'order': order.get(name),
+        })
+    catalog.sort(key=contest_sort_key)
+    return catalog, errors
+
+def catalog_key(date_path=DATE_CSV, csv_dir=CSV_DIR):
+    with open(date_path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    files = sorted(f for f in os.listdir(csv_dir) if f.endswith('.csv')) if os.path.isdir(csv_dir) else []
+    return [CATALOG_VERSION, digest, hashlib.sha1('\n'.join(files).encode('utf-8')).hexdigest()]
+
+def load_catalog(date_path=DATE_CSV, csv_dir=CSV_DIR, cache_path=CATALOG_PATH):
+    '''
+    读取比赛目录，date.csv 与 csv_dir 的文件列表未变化时直接使用缓存
+    返回 (目录, 错误列表)
+    '''
+    key = catalog_key(date_path, csv_dir)
+    if cache_path is not None and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached['key'] == key:
+                for c in cached['catalog']:
+                    c['date'] = datetime.strptime(c['date'], '%Y/%m/%d') if c['date'] else None
+                return cached['catalog'], cached['errors']
+        except Exception:
+            pass
+
+    catalog, errors = build_catalog(date_path, csv_dir)
+    if cache_path is not None:
+        entries = [dict(c, date=c['date'].strftime('%Y/%m/%d') if c['date'] else None) for c in catalog]
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'catalog': entries, 'errors': errors}, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    return catalog, errors
+
+if __name__ == '__main__':
+    catalog, errors = load_catalog(cache_path=None)
+    print(f"共 {len(catalog)} 场比赛，其中 {sum(c['has_csv'] for c in catalog)} 场有榜单")
+    for error in errors:
+        print(error)
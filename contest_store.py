@@ -0,0 +1,294 @@
+import csv
+import io
+import os
+import re
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from school_resolver import load_index, normalize
+from contest_meta import parse_name
+from instrument import span
+from csv_schema import validate_contest, read_contest
+
+CSV_DIR = 'csv'
+STORE_DIR = 'contest_store'
+STORE_VERSION = 3
+
+# 每列的存储类型，缺失值记为 -1
+COLUMNS = {
+    'contest': np.int32,    # 比赛编号，对应 meta['contests'] 的下标
+    'season': np.int16,
+    'type': np.int8,        # 0: ICPC, 1: CCPC
+    'city': np.int32,       # 城市编号，对应 meta['cities'] 的下标
+    'row': np.int32,        # 在原 CSV 中的行号（pandas 读取后的索引）
+    'rank': np.int32,
+    'school_id': np.int32,  # 解析后的学校编号，对应 meta['names'] 的下标
+    'name_id': np.int32,    # 规范化后的原始学校名编号，对应 meta['names'] 的下标
+    'team_id': np.int32,    # 队名编号，对应 meta['names'] 的下标
+    'member1_id': np.int32, # 队员姓名（已规范化）编号，对应 meta['names'] 的下标
+    'member2_id': np.int32,
+    'member3_id': np.int32,
+    'solved': np.int32,
+    'penalty': np.int32,
+}
+# 以字符串形式保存在 meta['names'] 中的列，及其在 _frame 中的名称
+STRING_COLUMNS = {
+    'school_id': 'school',
+    'name_id': 'name',
+    'team_id': 'team',
+    'member1_id': 'member1',
+    'member2_id': 'member2',
+    'member3_id': 'member3',
+}
+TYPES = ['ICPC', 'CCPC']
+
+def contains_chinese(text):
+    if text is None:
+        return False
+    return bool(re.search('[\u4e00-\u9fff]', text))
+
+def scan_language(headers, reader, column, limit=50):
+    '''检查某列前 limit 行中是否出现中文，与 readme.py 的判断规则一致'''
+    if column not in headers:
+        return False
+    index = headers.index(column)
+    for count, row in enumerate(reader, 1):
+        if index < len(row) and row[index] and contains_chinese(row[index]):
+            return True
+        if count >= limit:
+            break
+    return False
+
+def to_int(column, length):
+    if column is None:
+        return np.full(length, -1, dtype=np.int64)
+    values = pd.to_numeric(column, errors='coerce')
+    return values.fillna(-1).round().astype(np.int64).to_numpy()
+
+def parse_contest(name, data):
+    '''
+    解析一场比赛的 CSV 内容
+    返回 (比赛元数据, 各列数组, 各字符串列的取值列表)，缺失值为 None
+    '''
+    text = data.decode('utf-8-sig')
+    rows = csv.reader(io.StringIO(text))
+    headers = [header.strip('\ufeff') for header in next(rows, [])]
+    school_has_chinese = scan_language(headers, rows, 'School')
+    rows = csv.reader(io.StringIO(text))
+    next(rows, None)
+    members_has_chinese = scan_language(headers, rows, 'Member1')
+
+    parsed = parse_name(name)
+    if parsed is None:
+        raise ValueError(f"比赛名不符合 {{届数}}_{{ICPC|CCPC}}_{{城市}} 格式: {name}")
+    season, contest_type, city = parsed
+    meta = {
+        'name': name,
+        'season': season,
+        'type': contest_type,
+        'city': city,
+        'columns': headers,
+        'school_has_chinese': school_has_chinese,
+        'members_has_chinese': members_has_chinese,
+    }
+
+    # 按声明的类型检查并记录 schema，之后按 schema 读取，不再推断类型；不合格的行不进入存储
+    with span('csv_validate', contest=name):
+        schema, rejected, errors = validate_contest(text, os.path.join(CSV_DIR, f'{name}.csv'))
+    meta['schema'] = schema
+    meta['rejected'] = rejected
+    meta['errors'] = errors
+
+    with span('csv_read', contest=name) as s:
+        df = read_contest(data, schema, rejected=rejected)
+        s.rows = len(df)
+    n = len(df)
+    columns = {
+        'row': df.index.to_numpy(dtype=np.int64),
+        'rank': to_int(df.get('Rank'), n),
+        'solved': to_int(df.get('Solved'), n),
+        'penalty': to_int(df.get('Penalty'), n),
+    }
+    strings = {c: [None] * n for c in STRING_COLUMNS}
+    if 'School' in df.columns:
+        with span('school_normalize', contest=name) as s:
+            alt_zh = load_index()['alt_zh']
+            strings['name_id'] = [normalize(school) for school in df['School']]
+            strings['school_id'] = [alt_zh.get(school, school) for school in strings['name_id']]
+            s.rows = n
+    if 'Team' in df.columns:
+        strings['team_id'] = [str(team).strip() if pd.notna(team) else None for team in df['Team']]
+    for k in (1, 2, 3):
+        if f'Member{k}' in df.columns:
+            strings[f'member{k}_id'] = [normalize(member) if pd.notna(member) and normalize(member) else None
+                                        for member in df[f'Member{k}']]
+    return meta, columns, strings
+
+class ContestStore:
+    '''
+    所有比赛榜单的列式存储，数组以 mmap 方式打开
+    行按比赛顺序排列，contest_offsets 给出每场比赛的行区间；
+    school_order/school_offsets 给出每个学校的行号列表
+    '''
+    def __init__(self, store_dir=STORE_DIR):
+        with open(os.path.join(store_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.columns = {c: np.load(os.path.join(store_dir, f'{c}.npy'), mmap_mode='r') for c in COLUMNS}
+        self.contest_offsets = np.load(os.path.join(store_dir, 'contest_offsets.npy'), mmap_mode='r')
+        self.school_order = np.load(os.path.join(store_dir, 'school_order.npy'), mmap_mode='r')
+        self.school_offsets = np.load(os.path.join(store_dir, 'school_offsets.npy'), mmap_mode='r')
+        self.names = self.meta['names']
+        self.name_ids = {name: i for i, name in enumerate(self.names)}
+        self.contest_ids = {c['name']: i for i, c in enumerate(self.meta['contests'])}
+
+    @property
+    def contests(self):
+        return [c['name'] for c in self.meta['contests']]
+
+    def info(self, contest):
+        '''比赛元数据：赛季、类型、城市、列名、各列类型（schema）、被拒绝的行及语言标记'''
+        return self.meta['contests'][self.contest_ids[contest]]
+
+    def _frame(self, rows):
+        df = pd.DataFrame({c: np.asarray(self.columns[c][rows]) for c in COLUMNS})
+        df['contest'] = [self.meta['contests'][i]['name'] for i in df['contest']]
+        df['type'] = [TYPES[i] for i in df['type']]
+        df['city'] = [self.meta['cities'][i] for i in df['city']]
+        for c, name in STRING_COLUMNS.items():
+            df[name] = [self.names[i] if i >= 0 else None for i in df[c]]
+        return df
+
+    def contest(self, contest):
+        '''一场比赛的所有行'''
+        i = self.contest_ids[contest]
+        return self._frame(slice(self.contest_offsets[i], self.contest_offsets[i + 1]))
+
+    def school(self, school):
+        '''一个学校（解析后的名称）在所有比赛中的行'''
+        i = self.name_ids.get(school)
+        if i is None:
+            return self._frame(np.array([], dtype=np.int64))
+        return self._frame(np.asarray(self.school_order[self.school_offsets[i]:self.school_offsets[i + 1]]))
+
+def file_hash(data):
+    return hashlib.sha1(data).hexdigest()
+
+def write_meta(store_dir, meta):
+    tmp_path = os.path.join(store_dir, 'meta.tmp.json')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(store_dir, 'meta.json'))
+
+def build_store(csv_dir=CSV_DIR, store_dir=STORE_DIR):
+    '''
+    解析 csv_dir 下的所有榜单并写入 store_dir
+    与已有存储相比修改时间和大小未变的文件不再读取，内容未变的比赛直接复用，不再解析
+    '''
+    school_key = load_index()['key']
+    old = None
+    if os.path.exists(os.path.join(store_dir, 'meta.json')):
+        try:
+            old = ContestStore(store_dir)
+            if old.meta['version'] != STORE_VERSION or old.meta['school_key'] != list(school_key):
+                old = None
+        except Exception:
+            old = None
+    old_hashes = {c['name']: c['hash'] for c in old.meta['contests']} if old is not None else {}
+
+    # 先比较文件的修改时间和大小，相同则认为内容未变，不再读取
+    old_stats = {c['name']: (c.get('mtime'), c.get('size')) for c in old.meta['contests']} if old is not None else {}
+    sources, hashes, stats = {}, {}, {}
+    for filename in sorted(os.listdir(csv_dir)):
+        if filename.endswith('.csv'):
+            name = filename[:-4]
+            path = os.path.join(csv_dir, filename)
+            st = os.stat(path)
+            stats[name] = (st.st_mtime_ns, st.st_size)
+            if old_stats.get(name) == stats[name]:
+                hashes[name] = old_hashes[name]
+                continue
+            with open(path, 'rb') as f:
+                sources[name] = f.read()
+            hashes[name] = file_hash(sources[name])
+    if old is not None and hashes == old_hashes:
+        if stats != old_stats:
+            # 内容未变但文件被改写过（如 touch），只更新元数据中的文件状态
+            for c in old.meta['contests']:
+                c['mtime'], c['size'] = stats[c['name']]
+            write_meta(store_dir, old.meta)
+        return old
+
+    contests, cities, names = [], [], []
+    city_ids, name_ids = {}, {}
+    def intern(table, ids, value):
+        if value not in ids:
+            ids[value] = len(table)
+            table.append(value)
+        return ids[value]
+
+    parts = {c: [] for c in COLUMNS}
+    offsets = [0]
+    for name in hashes:
+        digest = hashes[name]
+        if old_hashes.get(name) == digest:
+            meta = old.info(name)
+            i = old.contest_ids[name]
+            rows = slice(old.contest_offsets[i], old.contest_offsets[i + 1])
+            columns = {c: np.asarray(old.columns[c][rows]) for c in ('row', 'rank', 'solved', 'penalty')}
+            strings = {c: [old.names[j] if j >= 0 else None for j in old.columns[c][rows]] for c in STRING_COLUMNS}
+        else:
+            meta, columns, strings = parse_contest(name, sources[name])
+            meta['hash'] = digest
+        meta['mtime'], meta['size'] = stats[name]
+
+        n = len(columns['row'])
+        contest_id = len(contests)
+        contests.append(meta)
+        columns['contest'] = np.full(n, contest_id)
+        columns['season'] = np.full(n, meta['season'])
+        columns['type'] = np.full(n, TYPES.index(meta['type']) if meta['type'] in TYPES else -1)
+        columns['city'] = np.full(n, intern(cities, city_ids, meta['city']))
+        for c in STRING_COLUMNS:
+            columns[c] = np.array([intern(names, name_ids, s) if s is not None else -1 for s in strings[c]],
+                                  dtype=np.int64)
+        for c in COLUMNS:
+            parts[c].append(np.asarray(columns[c]).astype(COLUMNS[c]))
+        offsets.append(offsets[-1] + n)
+    del old
+
+    arrays = {c: np.concatenate(parts[c]) if parts[c] else np.array([], dtype=COLUMNS[c]) for c in COLUMNS}
+    # 按学校建立倒排索引
+    school_ids = arrays['school_id']
+    school_order = np.argsort(school_ids, kind='stable')
+    school_order = school_order[school_ids[school_order] >= 0].astype(np.int64)
+    school_offsets = np.searchsorted(school_ids[school_order], np.arange(len(names) + 1)).astype(np.int64)
+
+    os.makedirs(store_dir, exist_ok=True)
+    arrays['contest_offsets'] = np.array(offsets, dtype=np.int64)
+    arrays['school_order'] = school_order
+    arrays['school_offsets'] = school_offsets
+    for c, array in arrays.items():
+        tmp_path = os.path.join(store_dir, f'{c}.tmp.npy')
+        np.save(tmp_path, array)
+        os.replace(tmp_path, os.path.join(store_dir, f'{c}.npy'))
+    meta = {
+        'version': STORE_VERSION,
+        'school_key': list(school_key),
+        'contests': contests,
+        'cities': cities,
+        'names': names,
+    }
+    write_meta(store_dir, meta)
+    return ContestStore(store_dir)
+
+def open_store(csv_dir=CSV_DIR, store_dir=STORE_DIR):
+    '''打开比赛存储，csv_dir 有变化时先增量更新'''
+    return build_store(csv_dir, store_dir)
+
+if __name__ == '__main__':
+    store = build_store()
+    print(f"比赛存储已更新: {len(store.contests)} 场比赛, {len(store.columns['contest'])} 行")
+    for contest in store.contests:
+        for error in store.info(contest).get('errors', []):
+            print(error)
@@ -1,7 +1,18 @@
 import pandas as pd
 import os
+import sys
+import json
 import shutil
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from tqdm import tqdm
+from contest_meta import parse_filename
+from instrument import span, collect, merge
+
+# 解析逻辑变化时递增，使清单中的旧记录失效
+PARSER_VERSION = 1
+MANIFEST_PATH = 'convert_manifest.json'
 
 def export_formal_team_to_csv(path, output_path=None):
     """
@@ -18,62 +29,116 @@ def export_formal_team_to_csv(path, output_path=None):
     # 读取Excel文件
     try:
         # 读取整个工作表(不自动转换列名)
-        df = pd.read_excel(path, sheet_name='正式队伍', header=None)
+        with span('excel_read', file=path) as s:
+            df = pd.read_excel(path, sheet_name='正式队伍', header=None)
+            s.rows = len(df)
     except Exception as e:
         raise ValueError(f"读取文件失败: {str(e)}")
     
-    # 检查第一行是否有且只有一个非空值
-    first_row = df.iloc[0]
-    non_empty_count = first_row.notnull().sum()
-    
-    # 如果第一行只有一个非空值，则删除该行
-    if non_empty_count == 1:
-        df = df.iloc[1:]
+    with span('sheet_cleanup', file=path) as s:
+        # 检查第一行是否有且只有一个非空值
+        first_row = df.iloc[0]
+        non_empty_count = first_row.notnull().sum()
+        
+        # 如果第一行只有一个非空值，则删除该行
+        if non_empty_count == 1:
+            df = df.iloc[1:]
+        s.rows = len(df)
     
     # 导出为CSV文件
-    df.to_csv(output_path, index=False, header=False, encoding='utf-8-sig')
+    with span('csv_write', file=output_path) as s:
+        df.to_csv(output_path, index=False, header=False, encoding='utf-8-sig')
+        s.rows = len(df)
     return output_path
 
 def parse(name):
-    xcpc = None
-    if 'ICPC' in name or 'International' in name or '国际' in name:
-        xcpc = 'ICPC'
-    elif 'CCPC' in name or '中国' in name:
-        xcpc = 'CCPC'
-    assert xcpc is not None, f"无法解析竞赛类型: {name}"
-
-    year = None
-    offset = 1975 if xcpc == 'ICPC' else 2014
-    if '第' in name and '届' in name:
-        year = int(name.split('第')[1].split('届')[0].strip())
-    elif '第' in name and '屆' in name:
-        year = int(name.split('第')[1].split('屆')[0].strip())
-    elif 'th' in name:
-        year = int(name.split('th')[0].split()[-1].strip())
-    elif '202' in name:
-        year = name[name.index('202'): name.index('202') + 4]
-        year = int(year) - offset
-    elif '201' in name:
-        year = name[name.index('201'): name.index('201') + 4]
-        year = int(year) - offset
-    assert year is not None, f"无法解析年份: {name}"
-
-    city = None
-    if '站' in name and '赛' in name:
-        pos_zhan = name.index('站')
-        pos_sai = name.rfind('赛', 0, pos_zhan)
-        city = name[pos_sai + 1: pos_zhan].strip()
-    elif '澳門' in name or 'macau' in name.lower():
-        city = '澳门'
-    elif 'Yinchuan' in name:
-        city = '银川'
-    elif '决赛' in name:
-        city = '总决赛' if xcpc == 'CCPC' else 'ECFinal'
-    elif 'East' in name and 'Final' in name:
-        city = 'ECFinal'
-    assert city is not None, f"无法解析城市: {name}"
-
-    return year, xcpc, city
+    """由原始文件名解析 (届数, 'ICPC'/'CCPC', 城市)，语法见 contest_meta.parse_filename"""
+    return parse_filename(name)
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def load_manifest(path=MANIFEST_PATH):
+    """读取转换清单 {源文件: {'hash', 'parser_version', 'output'}}"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+def convert_file(src_dir, file, dst_dir):
+    """
+    转换单个源文件，返回 (file, 输出路径, 错误信息, 计时记录)
+    在子进程中运行，异常不会向外抛出，而是作为错误信息返回
+    """
+    try:
+        return _convert_file(src_dir, file, dst_dir) + (collect(),)
+    except Exception as e:
+        return file, None, f"{type(e).__name__}: {e}", collect()
+
+def _convert_file(src_dir, file, dst_dir):
+    try:
+        year, xcpc, city = parse(file)
+        csv_path = os.path.join(dst_dir, f'{year}_{xcpc}_{city}.csv')
+        if file.endswith('.xlsx'):
+            export_formal_team_to_csv(os.path.join(src_dir, file), output_path=csv_path)
+        else:
+            shutil.copy(os.path.join(src_dir, file), csv_path)
+        return file, csv_path, None
+    except Exception as e:
+        return file, None, f"{type(e).__name__}: {e}"
+
+def convert_all(src_dir='org', dst_dir='csv', jobs=None, force=False, manifest_path=MANIFEST_PATH, exclude=()):
+    """
+    并行转换 src_dir 下所有 .xlsx/.csv 文件，exclude 中的文件（如由 rl.py 处理的 RankLand 榜单）除外
+    源文件哈希与解析器版本都未变化、且输出文件仍存在时跳过
+    返回 (转换成功的文件列表, 跳过的文件列表, {文件: 错误信息})
+    """
+    manifest = {} if force else load_manifest(manifest_path)
+    pending, skipped = [], []
+    hashes = {}
+    for file in sorted(os.listdir(src_dir)):
+        if not file.endswith(('.xlsx', '.csv')) or file in exclude:
+            continue
+        hashes[file] = file_hash(os.path.join(src_dir, file))
+        entry = manifest.get(file)
+        if (entry is not None and entry['hash'] == hashes[file]
+                and entry['parser_version'] == PARSER_VERSION
+                and os.path.exists(entry['output'])):
+            skipped.append(file)
+        else:
+            pending.append(file)
+
+    converted, errors = [], {}
+    def record(file, csv_path, error, events):
+        merge(events)
+        if error is not None:
+            errors[file] = error
+            manifest.pop(file, None)
+        else:
+            converted.append(file)
+            manifest[file] = {'hash': hashes[file], 'parser_version': PARSER_VERSION, 'output': csv_path}
+
+    if jobs == 1 or len(pending) <= 1:
+        for file in tqdm(pending, desc="Processing files"):
+            record(*convert_file(src_dir, file, dst_dir))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(convert_file, src_dir, file, dst_dir) for file in pending]
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Processing files"):
+                record(*future.result())
+
+    # 删除已不存在的源文件记录
+    for file in list(manifest):
+        if file not in hashes:
+            del manifest[file]
+    save_manifest(manifest, manifest_path)
+    return converted, skipped, errors
 
 
 # 使用示例
@@ -84,13 +149,15 @@ if __name__ == "__main__":
     #     print(f"文件已成功导出至: {csv_path}")
     # except Exception as e:
     #     print(f"处理过程中出错: {str(e)}")
-    files = os.listdir('org')
-    for file in tqdm(files, desc="Processing files"):
-        if file.endswith('.xlsx'):
-            year, xcpc, city = parse(file)
-            csv_path = os.path.join('csv', f'{year}_{xcpc}_{city}.csv')
-            export_formal_team_to_csv(os.path.join('org', file), output_path=csv_path)
-        elif file.endswith('.csv'):
-            year, xcpc, city = parse(file)
-            csv_path = os.path.join('csv', f'{year}_{xcpc}_{city}.csv')
-            shutil.copy(os.path.join('org', file), csv_path)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='将 org 下的榜单转换为 csv')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='并行进程数（默认为CPU核数，1为串行）')
+    parser.add_argument('--force', action='store_true', help='忽略转换清单，重新转换所有文件')
+    args = parser.parse_args()
+
+    converted, skipped, errors = convert_all(jobs=args.jobs, force=args.force)
+    print(f"转换 {len(converted)} 个文件，跳过未变化的 {len(skipped)} 个文件，失败 {len(errors)} 个文件")
+    if errors:
+        print("失败列表:")
+        for file in sorted(errors):
+            print(f"  {file}: {errors[file]}")
+        sys.exit(1)
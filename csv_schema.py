@@ -0,0 +1,131 @@
+import io
+import os
+import re
+import csv
+import sys
+import pandas as pd
+from problem_cells import CELL_PATTERN
+
+CSV_DIR = 'csv'
+
+# 声明的列类型，未声明的列按字符串读取
+COLUMN_TYPES = {
+    'Rank': 'int',
+    'School Rank': 'int',
+    'Organization Rank': 'int',
+    'Solved': 'int',
+    'Penalty': 'int',
+    'Dirt': 'percent',     # 28% 或 0.28，统一为比例
+    'Unofficial': 'flag',  # Y/N
+    'Girl': 'flag',
+}
+# 每个榜单必须有的列，这些列的值不能为空
+REQUIRED = ['Rank', 'Solved', 'Penalty']
+
+_int = re.compile(r'\d+(?:\.0*)?')
+_percent = re.compile(r'(\d+(?:\.\d*)?)(%?)')
+
+def column_type(column):
+    '''列的声明类型：单个大写字母为题目列（cell），其余按 COLUMN_TYPES，默认为 str'''
+    if len(column) == 1 and 'A' <= column <= 'Z':
+        return 'cell'
+    return COLUMN_TYPES.get(column, 'str')
+
+def check_value(kind, value):
+    '''检查单个非空值，合法时返回 None，否则返回错误说明'''
+    if kind == 'int' and not _int.fullmatch(value):
+        return '不是非负整数'
+    if kind == 'cell' and not CELL_PATTERN.fullmatch(value):
+        return '不是 +次数(分钟) / -次数 格式'
+    if kind == 'flag' and value not in ('Y', 'N'):
+        return '不是 Y/N'
+    if kind == 'percent' and not _percent.fullmatch(value):
+        return '不是百分比'
+    return None
+
+def validate_contest(text, path='<csv>'):
+    '''
+    按声明的类型检查一场比赛的 CSV 内容
+    返回 (schema, rejected, errors)：schema 为 {列名: 类型}，rejected 为被拒绝的行（与 pd.read_csv 的行号一致），
+    errors 为 "文件:行: 说明" 格式的错误列表；全空的行直接跳过，不算错误
+    '''
+    text = text.lstrip('\ufeff')
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader, None)
+    if header is None:
+        return {}, [], [f"{path}:1: 文件为空"]
+    header = [column.strip() for column in header]
+    schema = {column: column_type(column) for column in header}
+    errors = [f"{path}:1: 缺少必需的列 {column}" for column in REQUIRED if column not in schema]
+    if errors:
+        return schema, [], errors
+    kinds = [schema[column] for column in header]
+    required = {header.index(column) for column in REQUIRED}
+
+    rejected = []
+    row, line = 0, reader.line_num + 1
+    for record in reader:
+        start, line = line, reader.line_num + 1
+        if not record:
+            # pd.read_csv 跳过空行，不占行号
+            continue
+        problems = []
+        if len(record) > len(header):
+            problems.append(f"有 {len(record)} 个字段，多于表头的 {len(header)} 个")
+        elif any(record):
+            for k, value in enumerate(record):
+                value = value.strip()
+                if not value:
+                    if k in required:
+                        problems.append(f"{header[k]} 为空")
+                    continue
+                message = check_value(kinds[k], value)
+                if message is not None:
+                    problems.append(f"{header[k]} {message}: {value!r}")
+            problems += [f"{header[k]} 为空" for k in required if k >= len(record)]
+        if problems:
+            rejected.append(row)
+            errors.append(f"{path}:{start}: {'; '.join(problems)}")
+        row += 1
+    return schema, rejected, errors
+
+def coerce(kind, column):
+    '''将按字符串读取的列转换为声明的类型：int 为 Int64，percent 为 Float64，flag 为 boolean，其余保持字符串'''
+    if kind == 'int':
+        return pd.to_numeric(column.str.strip()).astype('Int64')
+    if kind == 'percent':
+        match = column.str.strip().str.extract(_percent.pattern)
+        values = pd.to_numeric(match[0]).astype('Float64')
+        return values.where(match[1] != '%', values / 100)
+    if kind == 'flag':
+        return column.str.strip().map({'Y': True, 'N': False}).astype('boolean')
+    return column
+
+def read_contest(source, schema, usecols=None, rejected=()):
+    '''
+    按记录的 schema 读取比赛 CSV，不做类型推断；source 为路径或 bytes，usecols 为要读取的列（必需的列总会读取）
+    全空的行与被拒绝的行不出现在结果中，行号（index）与 pd.read_csv 一致
+    '''
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    required = [c for c in REQUIRED if c in schema]
+    columns = {c for c in schema if usecols is None or c in usecols or c in required}
+    df = pd.read_csv(source, dtype=str, usecols=lambda c: c.strip() in columns, encoding='utf-8-sig')
+    df.columns = [c.strip() for c in df.columns]
+    # 未被拒绝的非空行必需的列都不为空，据此去掉全空的行
+    df = df[df[required or list(df.columns)].notna().any(axis=1)].drop(index=list(rejected), errors='ignore')
+    for column in df.columns:
+        df[column] = coerce(schema[column], df[column])
+    return df
+
+if __name__ == '__main__':
+    files = sys.argv[1:] or sorted(os.path.join(CSV_DIR, f) for f in os.listdir(CSV_DIR) if f.endswith('.csv'))
+    failed = 0
+    for path in files:
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            schema, rejected, errors = validate_contest(f.read(), path)
+        for error in errors:
+            print(error)
+        failed += bool(errors)
+    print(f"检查 {len(files)} 个文件，{failed} 个文件有错误")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import tracemalloc
+from contextlib import contextmanager
+try:
+    import resource
+except ImportError:
+    # Windows 上没有 resource 模块，不记录常驻内存
+    resource = None
+
+# 设置 XCPC_TRACE=<路径> 时记录各阶段的耗时，进程退出时写出 Chrome trace JSON 并打印汇总表
+# 设置 XCPC_TRACE_MEMORY=1 时用 tracemalloc 统计每个阶段的 Python 内存峰值（会拖慢运行）
+TRACE_PATH = os.path.abspath(os.environ['XCPC_TRACE']) if os.environ.get('XCPC_TRACE') else None
+TRACE_MEMORY = os.environ.get('XCPC_TRACE_MEMORY') == '1'
+
+_events = []
+_lock = threading.Lock()
+
+def max_rss_mb():
+    '''进程到目前为止的最大常驻内存（MB），不支持时返回 None'''
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位为 KB，macOS 上为字节
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 1024
+
+class Span:
+    '''一个阶段的记录，可设置 rows 及其他参数，end() 时写入事件'''
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.rows = None
+        self.start = None
+        self.start_rss = None
+        if TRACE_PATH is not None:
+            if TRACE_MEMORY:
+                # 嵌套阶段会重置峰值，外层阶段的峰值只反映内层结束之后的部分
+                tracemalloc.reset_peak()
+            else:
+                self.start_rss = max_rss_mb()
+            self.start = time.time_ns()
+
+    def end(self, rows=None):
+        if rows is not None:
+            self.rows = rows
+        if self.start is None:
+            return
+        end = time.time_ns()
+        event = {
+            'name': self.name,
+            'cat': os.path.basename(sys.argv[0]) or 'python',
+            'ph': 'X',
+            'ts': self.start / 1000,
+            'dur': (end - self.start) / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident() % 1000000,
+            'args': {k: v if isinstance(v, (int, float, bool)) or v is None else str(v) for k, v in self.args.items()},
+        }
+        self.start = None
+        if self.rows is not None:
+            event['args']['rows'] = int(self.rows)
+        if TRACE_MEMORY:
+            event['args']['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        elif self.start_rss is not None:
+            # 最大常驻内存是整个进程的，包含之前各阶段；阶段内的增长才归于该阶段
+            rss = max_rss_mb()
+            event['args']['process_peak_rss_mb'] = round(rss, 1)
+            event['args']['rss_growth_mb'] = round(rss - self.start_rss, 1)
+        with _lock:
+            _events.append(event)
+
+def begin(name, **args):
+    '''开始记录一个阶段，用于不便写成 with 块的脚本；结束时调用 end(rows=...)'''
+    return Span(name, args)
+
+@contextmanager
+def span(name, **args):
+    '''
+    记录一个阶段的墙钟时间、处理行数和内存峰值
+        with span('excel_read', file=path) as s:
+            df = pd.read_excel(path)
+            s.rows = len(df)
+    未开启记录时几乎没有开销
+    '''
+    s = Span(name, args)
+    try:
+        yield s
+    finally:
+        s.end()
+
+def collect():
+    '''取出并清空当前进程记录的事件，用于从子进程传回主进程'''
+    with _lock:
+        events = _events[:]
+        _events.clear()
+    return events
+
+def merge(events):
+    '''合并子进程传回的事件'''
+    with _lock:
+        _events.extend(events)
+
+def summary(events):
+    '''
+    按阶段汇总：次数、总耗时、平均/最大耗时、行数及内存
+    内存为 tracemalloc 统计的峰值（XCPC_TRACE_MEMORY=1），否则为阶段内进程最大常驻内存的增长
+    '''
+    stats = {}
+    for event in events:
+        s = stats.setdefault(event['name'], {'count': 0, 'total': 0.0, 'max': 0.0, 'rows': 0, 'peak_mb': 0.0})
+        s['count'] += 1
+        s['total'] += event['dur'] / 1e6
+        s['max'] = max(s['max'], event['dur'] / 1e6)
+        s['rows'] += event['args'].get('rows', 0)
+        s['peak_mb'] = max(s['peak_mb'], event['args'].get('peak_mb', event['args'].get('rss_growth_mb', 0)))
+    memory = 'peak MB' if any('peak_mb' in event['args'] for event in events) else '+RSS MB'
+    lines = [f"{'stage':<24}{'count':>7}{'total s':>10}{'mean ms':>10}{'max ms':>10}{'rows':>10}{memory:>9}"]
+    for name, s in sorted(stats.items(), key=lambda item: -item[1]['total']):
+        lines.append(f"{name:<24}{s['count']:>7}{s['total']:>10.3f}{s['total'] / s['count'] * 1000:>10.2f}"
+                     f"{s['max'] * 1000:>10.2f}{s['rows']:>10}{s['peak_mb']:>9.1f}")
+    return '\n'.join(lines)
+
+def write_trace(path=None):
+    '''写出 Chrome trace 格式的 JSON（可在 chrome://tracing 或 Perfetto 中打开）'''
+    path = path or TRACE_PATH
+    events = collect()
+    if not events:
+        return
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    # 同一路径已有记录时追加，便于一次刷新中多个脚本写入同一个 trace
+    previous = []
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)['traceEvents']
+        except Exception:
+            previous = []
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': previous + events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    print(f"\n{summary(events)}\ntrace 已写入 {path}", file=sys.stderr)
+
+if TRACE_PATH is not None:
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    atexit.register(write_trace)
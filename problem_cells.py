@@ -0,0 +1,120 @@
+import re
+import numpy as np
+import pandas as pd
+
+# 标准格式：+次数(分钟) 表示通过，-次数 表示未通过，- 表示无提交
+CELL_PATTERN = re.compile(r'([+-])(\d*)(?:\((\d+)\))?')
+
+def problem_columns(columns, last='Z'):
+    '''题目列：单个大写字母 A..last'''
+    return [col for col in columns if isinstance(col, str) and len(col) == 1 and 'A' <= col <= last]
+
+def _decode_value(value):
+    '''解析单个单元格，返回 (accepted, attempts, minutes, blank)，无法识别时返回 None'''
+    if not isinstance(value, str) or value == '':
+        return False, 0, -1, True
+    match = CELL_PATTERN.fullmatch(value.strip())
+    if match is None:
+        return None
+    sign, attempts, minutes = match.groups()
+    accepted = sign == '+' and minutes is not None
+    return accepted, int(attempts) if attempts else 0, int(minutes) if accepted else -1, False
+
+def _decode_rl_value(value):
+    '''
+    解析 RankLand 导出的单元格：RJ/次数 为未通过，AC/次数/h:mm 与 FB/次数/h:mm 为通过
+    无法转换的单元格返回 None，保持原样
+    '''
+    if not isinstance(value, str) or value == '':
+        return False, 0, -1, True
+    parts = value.split('/')
+    if value.startswith('RJ') and len(parts) >= 2 and parts[1].isdigit():
+        return False, int(parts[1]), -1, False
+    if value.startswith(('AC/', 'FB/')) and len(parts) >= 3 and parts[1].isdigit():
+        time_parts = parts[2].split(':')
+        if len(time_parts) >= 2:
+            return True, int(parts[1]), int(time_parts[0]) * 60 + int(time_parts[1]), False
+    return None
+
+def _decode(frame, decode_value):
+    '''
+    对 DataFrame 的所有单元格解码：先对不同取值各解析一次，再按编码展开
+    返回 dict，每项为与 frame 同形状的数组：
+    accepted(bool), attempts(int32), minutes(int32, 未通过为 -1), blank(bool, 空单元格),
+    unknown(bool, 无法识别的单元格)
+    '''
+    values = np.asarray(frame, dtype=object).ravel()
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    decoded = [decode_value(value) for value in uniques]
+    unknown = np.array([d is None for d in decoded], dtype=bool)
+    decoded = [(False, 0, -1, False) if d is None else d for d in decoded]
+    accepted, attempts, minutes, blank = zip(*decoded) if decoded else ((), (), (), ())
+    shape = np.shape(frame)
+    return {
+        'accepted': np.array(accepted, dtype=bool)[codes].reshape(shape),
+        'attempts': np.array(attempts, dtype=np.int32)[codes].reshape(shape),
+        'minutes': np.array(minutes, dtype=np.int32)[codes].reshape(shape),
+        'blank': np.array(blank, dtype=bool)[codes].reshape(shape),
+        'unknown': unknown[codes].reshape(shape),
+    }
+
+def decode(frame):
+    '''解码标准格式的题目列（+次数(分钟) / -次数 / -）'''
+    return _decode(frame, _decode_value)
+
+def decode_rl(frame):
+    '''解码 RankLand 格式的题目列（AC/FB/RJ），次数按整数解析（RJ/03 为 3 次）；转换为字符串见 convert_rl_cells'''
+    return _decode(frame, _decode_rl_value)
+
+def encode(accepted, attempts, minutes, blank=None):
+    '''
+    将数组编码为标准格式的字符串，空单元格为 NaN
+    未通过且提交次数为 0 时编码为 -
+    '''
+    accepted = np.asarray(accepted, dtype=bool)
+    attempts = np.asarray(attempts, dtype=np.int64)
+    minutes = np.where(accepted, np.asarray(minutes, dtype=np.int64), -1)
+    # 不同的 (accepted, attempts, minutes) 组合各格式化一次
+    keys = (attempts << 21) | ((minutes + 1) << 1) | accepted
+    codes, uniques = pd.factorize(keys.ravel())
+    strings = [f'+{key >> 21}({((key >> 1) & 0xFFFFF) - 1})' if key & 1 else
+               (f'-{key >> 21}' if key >> 21 else '-') for key in uniques.tolist()]
+    strings = np.array(strings + [np.nan], dtype=object)
+    if blank is not None:
+        codes = np.where(np.asarray(blank, dtype=bool).ravel(), len(uniques), codes)
+    return strings[codes].reshape(accepted.shape)
+
+def decode_contest(df):
+    '''解码一场比赛的所有题目列，返回 (题目列表, 解码结果)'''
+    problems = problem_columns(df.columns)
+    return problems, decode(df[problems])
+
+def _convert_rl_value(value):
+    '''
+    按 rl.py 原有的逐格规则转换单个 RankLand 单元格，次数按原文保留（RJ/0 -> -0，RJ/03 -> -03，AC/03/1:00 -> +03(60)）
+    RJ 取第二段作为次数；AC/FB 取第二段为次数、第三段 h:mm 换算为分钟；其余单元格保持原样
+    原来的循环在 AC/FB 的时间不是整数时抛出 ValueError，这里保持原样
+    '''
+    if not isinstance(value, str) or value == '':
+        return value
+    parts = value.split('/')
+    if value.startswith('RJ'):
+        return f'-{parts[1]}' if len(parts) >= 2 else value
+    if value.startswith(('AC/', 'FB/')) and len(parts) >= 3:
+        time_parts = parts[2].split(':')
+        if len(time_parts) >= 2:
+            try:
+                return f'+{parts[1]}({int(time_parts[0]) * 60 + int(time_parts[1])})'
+            except ValueError:
+                return value
+    return value
+
+def convert_rl_cells(frame):
+    '''
+    将 RankLand 格式的题目列转换为标准格式，输出与 rl.py 原来的逐格循环逐字相同，无法识别的单元格保持原样
+    不同的取值各转换一次；数值解析见 decode_rl，它会把次数规范化（RJ/03 为 3 次）
+    '''
+    values = np.asarray(frame, dtype=object).ravel()
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    converted = np.array([_convert_rl_value(value) for value in uniques], dtype=object)
+    return pd.DataFrame(converted[codes].reshape(np.shape(frame)), index=frame.index, columns=frame.columns)
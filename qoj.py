@@ -1,8 +1,13 @@
 import pandas as pd
 from bs4 import BeautifulSoup
 import re
+import os
+import csv
+from collections import deque
+from html.parser import HTMLParser
 from urllib.request import urlopen
 import sys
+from instrument import span
 
 def standings_html_to_csv(html_content):
     soup = BeautifulSoup(html_content, 'html.parser')
@@ -42,24 +47,7 @@ def standings_html_to_csv(html_content):
             time_str = time_font.get_text().strip() if time_font else ''
             
             # 处理不同类型的状态
-            if status_text.startswith('+'):
-                # 计算提交次数
-                attempts_match = re.search(r'\d+', status_text)
-                attempts = int(attempts_match.group(0)) + 1 if attempts_match else 1
-                
-                # 转换时间到分钟
-                time_minutes = 0
-                if ':' in time_str:
-                    h, m = map(int, time_str.split(':'))
-                    time_minutes = h * 60 + m
-                
-                problems_data.append(f"+{attempts}({time_minutes})")
-                
-            elif status_text.startswith('-'):
-                problems_data.append(status_text)
-                
-            else:  # 空单元格处理
-                problems_data.append('')
+            problems_data.append(convert_cell(status_text, time_str))
         
         row_data = [rank, username, solved, penalty] + problems_data
         data.append(row_data)
@@ -69,12 +57,181 @@ def standings_html_to_csv(html_content):
     df = pd.DataFrame(data, columns=columns)
     return df
 
+def convert_cell(status_text, time_str):
+    """将题目单元格转换为 +次数(分钟) / -次数 格式"""
+    if status_text.startswith('+'):
+        # 计算提交次数
+        attempts_match = re.search(r'\d+', status_text)
+        attempts = int(attempts_match.group(0)) + 1 if attempts_match else 1
+
+        # 转换时间到分钟
+        time_minutes = 0
+        if ':' in time_str:
+            h, m = map(int, time_str.split(':'))
+            time_minutes = h * 60 + m
+
+        return f"+{attempts}({time_minutes})"
+    elif status_text.startswith('-'):
+        return status_text
+    return ''
+
+class StandingsParser(HTMLParser):
+    """
+    增量解析 standings 表格，每解析完一行就放入 self.rows
+    第一项为列名，之后每项为一行数据，与 standings_html_to_csv 的结果一致
+    """
+    def __init__(self):
+        super().__init__()
+        self.rows = deque()
+        self.table_depth = 0      # 位于 standings 表格内时为嵌套的 table 层数
+        self.done = False         # standings 表格已解析完
+        self.header = None        # 题目列 ID
+        self.cells = None         # 当前行的单元格
+        self.cell = None          # 当前单元格
+        self.center_depth = 0
+        self.font_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == 'table':
+            if self.table_depth:
+                self.table_depth += 1
+            elif 'standings' in (dict(attrs).get('class') or '').split():
+                self.table_depth = 1
+            return
+        if not self.table_depth:
+            return
+        if tag == 'tr' and self.cells is None:
+            self.cells = []
+        elif tag in ('td', 'th') and self.cells is not None and self.cell is None:
+            self.cell = {'tag': tag, 'text': [], 'status': None, 'status_text': [], 'time': None, 'center': False}
+        elif self.cell is not None:
+            if self.center_depth and self.cell['status'] is None:
+                # <center> 的第一个子节点在此结束
+                self.end_status()
+            if tag == 'center':
+                if not self.cell['center']:
+                    self.cell['center'] = True
+                    self.center_depth = 1
+                elif self.center_depth:
+                    self.center_depth += 1
+            elif tag == 'font' and self.center_depth:
+                if self.cell['time'] is None:
+                    self.cell['time'] = []
+                    self.font_depth = 1
+                elif self.font_depth:
+                    self.font_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/> 等自闭合标签同样会结束 <center> 的第一个文本节点
+        if self.cell is not None and self.center_depth and self.cell['status'] is None:
+            self.end_status()
+
+    def handle_endtag(self, tag):
+        if self.done or not self.table_depth:
+            return
+        if tag == 'table':
+            self.table_depth -= 1
+            if not self.table_depth:
+                self.done = True
+        elif tag == 'center' and self.center_depth:
+            if self.cell['status'] is None:
+                self.end_status()
+            self.center_depth -= 1
+        elif tag == 'font' and self.font_depth:
+            self.font_depth -= 1
+        elif tag in ('td', 'th') and self.cell is not None and self.cell['tag'] == tag:
+            if self.center_depth and self.cell['status'] is None:
+                # <center> 未闭合
+                self.end_status()
+            self.cells.append(self.cell)
+            self.cell = None
+            self.center_depth = self.font_depth = 0
+        elif tag == 'tr' and self.cells is not None:
+            self.finish_row(self.cells)
+            self.cells = None
+
+    def handle_data(self, data):
+        if self.cell is None:
+            return
+        self.cell['text'].append(data)
+        if self.center_depth and self.cell['status'] is None:
+            # 文本可能在 feed() 的块边界处被拆开，先累积，到第一个子标签或 </center> 时再确定
+            self.cell['status_text'].append(data)
+        if self.font_depth:
+            self.cell['time'].append(data)
+
+    def end_status(self):
+        '''<center> 的第一个子节点为文本时即为提交状态（如 +6、-3），否则为空'''
+        self.cell['status'] = ''.join(self.cell['status_text']).strip()
+
+    def finish_row(self, cells):
+        if self.header is None:
+            # 跳过Rank、Username，最后三个是Solved/Penalty/Dirt
+            ths = [''.join(c['text']) for c in cells if c['tag'] == 'th'][2:-3]
+            self.header = [th.strip().split('\n')[0][0] for th in ths]
+            self.rows.append(['Rank', 'Username', 'Solved', 'Penalty'] + self.header)
+            return
+        tds = [c for c in cells if c['tag'] == 'td']
+        if not tds:
+            return
+        rank = ''.join(tds[0]['text']).strip()
+        if not rank.isdigit():
+            return
+        username = ''.join(tds[1]['text']).strip()
+        solved = ''.join(tds[-3]['text']).strip()
+        penalty = ''.join(tds[-2]['text']).strip()
+        problems_data = []
+        for td in tds[2:2 + len(self.header)]:
+            if not td['center']:
+                problems_data.append('')
+                continue
+            time_str = ''.join(td['time']).strip() if td['time'] is not None else ''
+            problems_data.append(convert_cell(td['status'] or '', time_str))
+        self.rows.append([rank, username, solved, penalty] + problems_data)
+
+def iter_standings(f, chunk_size=1 << 16):
+    """
+    从文件对象中流式读取 standings 表格
+    第一项为列名，之后逐行产出数据；内存占用与页面大小无关
+    """
+    parser = StandingsParser()
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        while parser.rows:
+            yield parser.rows.popleft()
+        if parser.done:
+            break
+    parser.close()
+    while parser.rows:
+        yield parser.rows.popleft()
+
+def standings_stream_to_csv(f, output_path, chunk_size=1 << 16):
+    """流式解析并逐行写出 CSV，与 standings_html_to_csv(...).to_csv(...) 的输出一致"""
+    with open(output_path, 'w', encoding='utf-8-sig', newline='') as out:
+        writer = csv.writer(out, lineterminator=os.linesep)
+        for row in iter_standings(f, chunk_size):
+            writer.writerow(row)
+
 # 示例使用
 if __name__ == "__main__":
     file = sys.argv[1]
     name = file.split('/')[-1].split('.')[0]
-    with open(file, 'r', encoding='utf-8') as f:
-        html_content = f.read()
-    
-    df = standings_html_to_csv(html_content)
-    df.to_csv(f"{name}.csv", index=False, encoding='utf-8-sig')
\ No newline at end of file
+    if '--stream' in sys.argv[2:]:
+        # 流式模式：边读边写，适用于很大的页面
+        with span('html_stream_to_csv', file=file), open(file, 'r', encoding='utf-8') as f:
+            standings_stream_to_csv(f, f"{name}.csv")
+        sys.exit(0)
+    with span('html_parse', file=file) as s:
+        with open(file, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+        
+        df = standings_html_to_csv(html_content)
+        s.rows = len(df)
+    with span('csv_write', file=f"{name}.csv") as s:
+        df.to_csv(f"{name}.csv", index=False, encoding='utf-8-sig')
+        s.rows = len(df)
\ No newline at end of file
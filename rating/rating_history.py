@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+HISTORY_PATH = 'rating/rating_history.parquet'
+
+def history_path(entity='school'):
+    '''各类实体的rating历史路径，学校沿用 HISTORY_PATH'''
+    if entity == 'school':
+        return HISTORY_PATH
+    return f'rating/rating_{entity}_history.parquet'
+
+def build_history(contests, names, contests_ids, contests_ranks, contests_ratings, initial=1400, key='school'):
+    '''
+    由每场比赛的参赛者数组构建长表，每个 (key, contest) 参赛记录一行
+    contests: 按时间排序的比赛名称列表
+    names: 编号 -> 名称
+    contests_ids/contests_ranks/contests_ratings: 每场比赛参赛者的编号、名次和赛后rating
+    '''
+    prev = np.full(len(names), initial, dtype=np.int64)
+    deltas = []
+    for ids, ratings in zip(contests_ids, contests_ratings):
+        deltas.append(ratings - prev[ids])
+        prev[ids] = ratings
+    concat = lambda arrays, dtype: np.concatenate(arrays).astype(dtype) if arrays else np.array([], dtype=dtype)
+    ids = concat(contests_ids, np.int64)
+    contest_codes = concat([np.full(len(a), i) for i, a in enumerate(contests_ids)], np.int64)
+
+    # 类别为参赛过的名称，按名称排序
+    used = np.unique(ids)
+    categories = sorted(names[i] for i in used)
+    codes = np.empty(len(names), dtype=np.int64)
+    codes[used] = pd.Index(categories).get_indexer([names[i] for i in used])
+
+    history = pd.DataFrame({
+        key: pd.Categorical.from_codes(codes[ids], categories=categories),
+        'contest': pd.Categorical.from_codes(contest_codes, categories=list(contests), ordered=True),
+        'rating': pd.array(concat(contests_ratings, np.int32), dtype='int32'),
+        'delta': pd.array(concat(deltas, np.int32), dtype='int32'),
+        'rank': pd.array(concat(contests_ranks, np.int32), dtype='int32'),
+    })
+    # 按实体聚集，读取单个学校/队伍时只需扫描少量 row group
+    return history.sort_values([key, 'contest'], kind='stable').reset_index(drop=True)
+
+def write_history(history, path=HISTORY_PATH):
+    '''写出 Parquet，实体列与 contest 为字典编码列'''
+    history.to_parquet(path, index=False, engine='pyarrow', compression='zstd', row_group_size=4096)
+
+def read_history(path=HISTORY_PATH, school=None, contest=None, key='school'):
+    '''
+    读取rating历史，可只读取某个学校（或队伍、队员，由 key 指定列名）或某场比赛的记录
+    '''
+    filters = []
+    if school is not None:
+        filters.append((key, '==', school))
+    if contest is not None:
+        filters.append(('contest', '==', contest))
+    return pd.read_parquet(path, engine='pyarrow', filters=filters or None)
+
+def to_wide(history, initial=1400.0, key='school'):
+    '''
+    导出为宽表：每行一个学校（或队伍、队员），每列一场比赛后的rating
+    未参赛的比赛沿用上一场的rating，首次参赛前为 initial
+    '''
+    contests = list(history['contest'].cat.categories)
+    wide = history.pivot(index=key, columns='contest', values='rating')
+    wide = wide.reindex(columns=contests).astype(float)
+    wide = wide.ffill(axis=1).fillna(initial)
+    wide.index = wide.index.astype(str)
+    wide.columns = [str(c) for c in wide.columns]
+    return wide.sort_index().rename_axis(key.capitalize()).reset_index()
@@ -0,0 +1,144 @@
+import os
+import sys
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from rating_utils import calculateRatingArray
+
+# Glicko-2 的尺度换算常数
+GLICKO_SCALE = 173.7178
+
+class EloModel:
+    '''
+    Codeforces 式的 Elo（calculateRatingArray），参数为默认值时与 rating_school.py 的结果一致
+    initial: 初始rating；scale: 胜率尺度；top: 第二次调整统计的前 top*sqrt(n) 名；
+    apply_inc: 是否应用第二次调整，max_drop: 其幅度上限
+    '''
+    name = 'elo'
+    defaults = {'initial': 1400, 'scale': 400, 'top': 4, 'apply_inc': False, 'max_drop': 10}
+
+    def __init__(self, **params):
+        self.params = dict(self.defaults, **params)
+        assert self.params['scale'] > 0, f"scale 必须为正数: {self.params['scale']}"
+
+    def new_state(self, n):
+        return {'rating': np.full(n, int(self.params['initial']), dtype=np.int64)}
+
+    def strength(self, state, ids):
+        return state['rating'][ids].astype(np.float64)
+
+    def update(self, state, ids, rank):
+        p = self.params
+        state['rating'][ids] = calculateRatingArray(rank, state['rating'][ids], scale=p['scale'], top=p['top'],
+                                                    apply_inc=bool(p['apply_inc']), max_drop=p['max_drop'])
+
+class Glicko2Model:
+    '''
+    Glicko-2，一场比赛视为参赛者两两之间的对局（名次相同为平局），每场比赛为一个评分周期
+    每个参赛者的对局按 opponents / (n - 1) 加权，即一场比赛相当于与 opponents 个对手各赛一局
+    未参赛的实体不更新（rating deviation 不随时间增大）
+    '''
+    name = 'glicko2'
+    defaults = {'initial': 1500, 'rd': 350, 'volatility': 0.06, 'tau': 0.5, 'opponents': 10}
+
+    def __init__(self, **params):
+        self.params = dict(self.defaults, **params)
+
+    def new_state(self, n):
+        p = self.params
+        return {
+            'mu': np.full(n, (p['initial'] - 1500) / GLICKO_SCALE),
+            'phi': np.full(n, p['rd'] / GLICKO_SCALE),
+            'sigma': np.full(n, float(p['volatility'])),
+        }
+
+    def strength(self, state, ids):
+        return state['mu'][ids] * GLICKO_SCALE + 1500
+
+    def update(self, state, ids, rank):
+        n = len(ids)
+        if n < 2:
+            return
+        tau = self.params['tau']
+        mu, phi, sigma = state['mu'][ids], state['phi'][ids], state['sigma'][ids]
+        rank = np.asarray(rank)
+
+        g = 1 / np.sqrt(1 + 3 * phi ** 2 / np.pi ** 2)
+        expected = 1 / (1 + np.exp(-g[None, :] * (mu[:, None] - mu[None, :])))
+        score = (rank[:, None] < rank[None, :]) + 0.5 * (rank[:, None] == rank[None, :])
+        weight = np.full((n, n), self.params['opponents'] / (n - 1))
+        np.fill_diagonal(weight, 0)
+        # 期望胜率饱和时信息量趋于 0，限定下界避免 v 为 inf
+        v = 1 / np.maximum((weight * g[None, :] ** 2 * expected * (1 - expected)).sum(axis=1), 1e-12)
+        gain = (weight * g[None, :] * (score - expected)).sum(axis=1)
+        delta = v * gain
+
+        # 波动率：Illinois 算法求解 f(x) = 0，所有参赛者同时迭代
+        a = np.log(sigma ** 2)
+        def f(x):
+            ex = np.exp(x)
+            return ex * (delta ** 2 - phi ** 2 - v - ex) / (2 * (phi ** 2 + v + ex) ** 2) - (x - a) / tau ** 2
+        A = a.copy()
+        big = delta ** 2 > phi ** 2 + v
+        B = np.where(big, np.log(np.maximum(delta ** 2 - phi ** 2 - v, 1e-300)), a - tau)
+        k = np.ones(n)
+        while True:
+            fix = ~big & (f(a - k * tau) < 0)
+            if not fix.any():
+                break
+            k[fix] += 1
+        B = np.where(big, B, a - k * tau)
+        fA, fB = f(A), f(B)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for _ in range(100):
+                active = np.abs(B - A) > 1e-6
+                if not active.any():
+                    break
+                C = A + (A - B) * fA / (fB - fA)
+                fC = f(C)
+                swap = active & (fC * fB < 0)
+                A, fA = np.where(swap, B, A), np.where(swap, fB, np.where(active, fA / 2, fA))
+                B, fB = np.where(active, C, B), np.where(active, fC, fB)
+        new_sigma = np.exp(A / 2)
+
+        # rating deviation 不超过初始值（与 Glicko 的惯例一致），否则波动率较大时 mu 会发散
+        phi_star = np.minimum(np.sqrt(phi ** 2 + new_sigma ** 2), self.params['rd'] / GLICKO_SCALE)
+        new_phi = 1 / np.sqrt(1 / phi_star ** 2 + 1 / v)
+        state['mu'][ids] = mu + new_phi ** 2 * gain
+        state['phi'][ids] = new_phi
+        state['sigma'][ids] = new_sigma
+
+MODELS = {model.name: model for model in (EloModel, Glicko2Model)}
+
+def pairwise_accuracy(strength, rank):
+    '''
+    名次不同的参赛者对中，赛前实力高者名次更好的比例（实力相同记 0.5）
+    返回 (正确的对数, 总对数)
+    '''
+    rank = np.asarray(rank)
+    better = rank[:, None] < rank[None, :]
+    diff = strength[:, None] - strength[None, :]
+    correct = ((diff > 0) + 0.5 * (diff == 0))[better].sum()
+    return float(correct), int(better.sum())
+
+def replay(model, contests, size, warmup=10):
+    '''
+    按顺序重放比赛并评估预测：每场比赛前用当前实力预测名次，与实际名次比较
+    contests: [(ids, ranks), ...]，编号为 0..size-1；前 warmup 场只更新不计分
+    返回 {'accuracy': 所有计分比赛的参赛者对合计的准确率, 'mean_accuracy': 各场比赛准确率的平均, 'contests': 计分的场数}
+    '''
+    state = model.new_state(size)
+    correct = pairs = 0
+    accuracies = []
+    for i, (ids, rank) in enumerate(contests):
+        if i >= warmup:
+            c, p = pairwise_accuracy(model.strength(state, ids), rank)
+            if p:
+                correct += c
+                pairs += p
+                accuracies.append(c / p)
+        model.update(state, ids, rank)
+    return {
+        'accuracy': correct / pairs if pairs else float('nan'),
+        'mean_accuracy': float(np.mean(accuracies)) if accuracies else float('nan'),
+        'contests': len(accuracies),
+    }
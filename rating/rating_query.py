@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import argparse
+from bisect import bisect_right
+from datetime import datetime, date
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from rating_utils import rating_color
+from school_resolver import getSchool
+from rating_history import HISTORY_PATH, read_history
+
+INITIAL_RATING = 1400
+
+def parse_date(value):
+    '''支持 2023/10/1、2023-10-01 及 date/datetime 对象，返回 date.toordinal()'''
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    return datetime.strptime(value.replace('-', '/'), '%Y/%m/%d').toordinal()
+
+class RatingIndex:
+    '''
+    rating历史的内存索引，加载后所有查询都不再读文件
+    每个学校保存按日期排序的 (日期, rating) 数组，按日期查询时二分；
+    每场比赛后保存按rating降序排列的所有已参赛学校，用于前k名和百分位查询
+    '''
+    def __init__(self, path=HISTORY_PATH, date_path='date.csv'):
+        history = read_history(path)
+        self.contests = [str(c) for c in history['contest'].cat.categories]
+        self.contest_ids = {c: i for i, c in enumerate(self.contests)}
+        self.schools = [str(s) for s in history['school'].cat.categories]
+        self.school_ids = {s: i for i, s in enumerate(self.schools)}
+
+        dates = pd.read_csv(date_path, dtype=str).set_index('contest')['date']
+        self.contest_dates = [parse_date(dates[c]) for c in self.contests]
+
+        school_codes = history['school'].cat.codes.to_numpy()
+        contest_codes = history['contest'].cat.codes.to_numpy()
+        ratings = history['rating'].to_numpy(dtype=np.int64)
+        ranks = history['rank'].to_numpy(dtype=np.int64)
+
+        # 历史按 (school, contest) 排序，每个学校占一段连续的行
+        bounds = np.searchsorted(school_codes, np.arange(len(self.schools) + 1))
+        contest_dates = np.array(self.contest_dates, dtype=np.int64)
+        self._dates, self._ratings, self._contests, self._ranks = [], [], [], []
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            self._dates.append(contest_dates[contest_codes[lo:hi]].tolist())
+            self._ratings.append(ratings[lo:hi].tolist())
+            self._contests.append(contest_codes[lo:hi].tolist())
+            self._ranks.append(ranks[lo:hi].tolist())
+
+        # 每场比赛后所有学校的rating（未参赛沿用上一场，首次参赛前为 NaN）
+        matrix = np.full((len(self.contests), len(self.schools)), np.nan)
+        matrix[contest_codes, school_codes] = ratings
+        filled = np.where(np.isnan(matrix), 0, np.arange(len(self.contests))[:, None])
+        matrix = matrix[np.maximum.accumulate(filled, axis=0), np.arange(len(self.schools))]
+        self._order, self._sorted = [], []
+        for row in matrix:
+            count = int(np.count_nonzero(~np.isnan(row)))
+            # rating相同时按学校名排序；NaN 排在最后并被截去
+            order = np.argsort(-row, kind='stable')[:count]
+            self._order.append(order)
+            self._sorted.append(row[order])
+
+        # rating 到颜色的查找表
+        self._color_lo = min(0, int(ratings.min()) if len(ratings) else 0)
+        hi = max(3000, int(ratings.max()) if len(ratings) else 0) + 1
+        self._colors = [rating_color(r) for r in range(self._color_lo, hi)]
+
+    def color(self, rating):
+        i = int(rating) - self._color_lo
+        if 0 <= i < len(self._colors):
+            return self._colors[i]
+        return rating_color(rating)
+
+    def _school_id(self, school):
+        '''学校编号；名称可以是规范的中文名、英文名或 school.csv 中的别名'''
+        i = self.school_ids.get(school)
+        if i is None:
+            i = self.school_ids.get(getSchool(school))
+        if i is None:
+            raise KeyError(f"未知的学校: {school}")
+        return i
+
+    def _contest_id(self, contest):
+        if contest not in self.contest_ids:
+            raise KeyError(f"未知的比赛: {contest}")
+        return self.contest_ids[contest]
+
+    def rating_as_of(self, school, when):
+        '''
+        学校在某天（含当天的比赛）之后的rating
+        返回 {'school', 'rating', 'contest', 'color'}，尚未参赛时 rating 为初始值、contest 为 None
+        '''
+        i = self._school_id(school)
+        j = bisect_right(self._dates[i], parse_date(when)) - 1
+        if j < 0:
+            rating, contest = INITIAL_RATING, None
+        else:
+            rating, contest = self._ratings[i][j], self.contests[self._contests[i][j]]
+        return {'school': self.schools[i], 'rating': rating, 'contest': contest, 'color': self.color(rating)}
+
+    def history(self, school):
+        '''学校参加的每场比赛及赛后rating、学校排名'''
+        i = self._school_id(school)
+        return [{'contest': self.contests[c], 'date': date.fromordinal(d).strftime('%Y/%m/%d'),
+                 'rating': r, 'rank': k}
+                for c, d, r, k in zip(self._contests[i], self._dates[i], self._ratings[i], self._ranks[i])]
+
+    def top(self, contest, k=50):
+        '''比赛后rating前k名的学校，rating相同时名次相同'''
+        j = self._contest_id(contest)
+        order, ratings = self._order[j][:k], self._sorted[j][:k]
+        result = []
+        for n, (i, rating) in enumerate(zip(order.tolist(), ratings.tolist())):
+            rank = n + 1 if n == 0 or rating != ratings[n - 1] else result[-1]['rank']
+            rating = int(rating)
+            result.append({'rank': rank, 'school': self.schools[i], 'rating': rating, 'color': self.color(rating)})
+        return result
+
+    def percentile(self, school, contest):
+        '''
+        比赛后学校在所有已参赛学校中的名次和百分位（100 为最高）
+        比赛时尚未参赛的学校返回 None
+        '''
+        i, j = self._school_id(school), self._contest_id(contest)
+        c = bisect_right(self._contests[i], j) - 1
+        if c < 0:
+            return None
+        rating = self._ratings[i][c]
+        ratings = self._sorted[j]
+        # ratings 为降序，取负后二分得到严格高于该rating的学校数
+        higher = int(np.searchsorted(-ratings, -rating, side='left'))
+        return {'school': self.schools[i], 'contest': contest, 'rating': rating, 'rank': higher + 1,
+                'total': len(ratings), 'percentile': 100.0 * (len(ratings) - higher) / len(ratings)}
+
+class Query(dict):
+    '''URL 查询参数，缺少参数时抛出 ValueError'''
+    def __missing__(self, key):
+        raise ValueError(f"缺少参数: {key}")
+
+def make_handler(index):
+    routes = {
+        '/rating': lambda q: index.rating_as_of(q['school'], q['date']),
+        '/history': lambda q: index.history(q['school']),
+        '/top': lambda q: index.top(q['contest'], int(q.get('k', 50))),
+        '/percentile': lambda q: index.percentile(q['school'], q['contest']),
+        '/contests': lambda q: index.contests,
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = Query((k, v[-1]) for k, v in parse_qs(url.query).items())
+            if url.path not in routes:
+                return self.reply(404, {'error': f"未知的路径: {url.path}", 'routes': sorted(routes)})
+            try:
+                return self.reply(200, routes[url.path](query))
+            except KeyError as e:
+                return self.reply(404, {'error': str(e).strip('"\'')})
+            except ValueError as e:
+                return self.reply(400, {'error': str(e)})
+
+        def reply(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='查询学校rating历史')
+    parser.add_argument('--school', help='学校名称')
+    parser.add_argument('--date', help='查询该日期后的rating，如 2023/10/1')
+    parser.add_argument('--contest', help='比赛名称，如 48_ICPC_南京')
+    parser.add_argument('-k', type=int, default=50, help='前k名')
+    parser.add_argument('--serve', action='store_true', help='启动本地 HTTP 服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    index = RatingIndex()
+    if args.serve:
+        server = ThreadingHTTPServer((args.host, args.port), make_handler(index))
+        print(f"rating查询服务: http://{args.host}:{args.port}/ (/rating /history /top /percentile /contests)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    else:
+        # 与 HTTP 接口一致，未知的学校/比赛及格式错误的日期只输出错误信息
+        try:
+            if args.school and args.date:
+                print(json.dumps(index.rating_as_of(args.school, args.date), ensure_ascii=False))
+            elif args.school and args.contest:
+                print(json.dumps(index.percentile(args.school, args.contest), ensure_ascii=False))
+            elif args.school:
+                for row in index.history(args.school):
+                    print(f"{row['date']}  {row['contest']:<16}{row['rating']:>6}{row['rank']:>6}")
+            elif args.contest:
+                for row in index.top(args.contest, args.k):
+                    print(f"{row['rank']:>4}  {row['school']:<20}{row['rating']:>6}")
+            else:
+                parser.print_help()
+        except (KeyError, ValueError) as e:
+            print(f"错误: {e.args[0] if e.args else e}", file=sys.stderr)
+            sys.exit(1)
@@ -0,0 +1,95 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from contest_store import open_store
+
+def lexicographic_ranks(group, key, solved, penalty):
+    '''
+    按 (solved 降序, penalty 升序) 对每组（比赛）内的实体排名，同分时名次相同（method='min'）
+    group: 每行所属组的编号，key: 实体编号（-1 的行不参与），solved/penalty: 成绩
+    每个实体在组内只保留最好的一行，成绩相同时保留靠前的行
+    返回保留的行下标及其名次，按 (组, 名次, 行顺序) 排列
+    '''
+    group = np.asarray(group, dtype=np.int64)
+    key = np.asarray(key, dtype=np.int64)
+    solved = np.asarray(solved, dtype=np.int64)
+    penalty = np.asarray(penalty, dtype=np.int64)
+    rows = np.flatnonzero(key >= 0)
+    if len(rows) == 0:
+        return rows, np.array([], dtype=np.int64)
+    # 稳定的多键排序，最后一个键为主键
+    order = rows[np.lexsort((penalty[rows], -solved[rows], group[rows]))]
+
+    # 同组内同一实体只保留第一次出现（即成绩最好）的行
+    pair = group[order] * (int(key.max()) + 1) + key[order]
+    _, first = np.unique(pair, return_index=True)
+    kept = order[np.sort(first)]
+
+    # 名次 = 所在同分段第一个位置在组内的序号 + 1
+    g, s, p = group[kept], solved[kept], penalty[kept]
+    n = len(kept)
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = g[1:] != g[:-1]
+    new_score = new_group.copy()
+    new_score[1:] |= (s[1:] != s[:-1]) | (p[1:] != p[:-1])
+    position = np.arange(n)
+    group_start = np.maximum.accumulate(np.where(new_group, position, 0))
+    score_start = np.maximum.accumulate(np.where(new_score, position, 0))
+    return kept, score_start - group_start + 1
+
+def entity_keys(store, rows, entity):
+    '''
+    各行的实体名称编号（-1 为不参与）及编号对应的名称
+    学校为解析后的学校名；队伍为 学校/队名，队员为 学校/姓名（学校或队名、姓名为空时不参与）
+    队员每行展开为三项，按 队员1、队员2、队员3 的顺序排列
+    '''
+    school = np.asarray(store.columns['school_id'][rows], dtype=np.int64)
+    if entity == 'school':
+        return school, store.names
+    columns = ['team_id'] if entity == 'team' else ['member1_id', 'member2_id', 'member3_id']
+    other = np.stack([np.asarray(store.columns[c][rows], dtype=np.int64) for c in columns], axis=1).ravel()
+    school = np.repeat(school, len(columns))
+    valid = (school >= 0) & (other >= 0)
+    # 先对 (学校, 名称) 编号对去重，再按拼接后的字符串去重，与按字符串区分实体一致
+    pairs, inverse = np.unique(np.stack([school[valid], other[valid]], axis=1), axis=0, return_inverse=True)
+    codes, names = pd.factorize(pd.Series([f'{store.names[a]}/{store.names[b]}' for a, b in pairs], dtype=object))
+    key = np.full(len(school), -1, dtype=np.int64)
+    key[valid] = codes[inverse.ravel()]
+    return key, list(names)
+
+def store_entity_ranks(store, contests, entities):
+    '''
+    一次性计算多场比赛各类实体的排名
+    返回 {contest: {entity: (名称列表, 名次数组)}}，名称按名次排列，同分时按榜单顺序
+    榜单缺少相应列的实体不出现在该比赛的结果中
+    '''
+    result = {contest: {} for contest in contests}
+    required = {'school': 'School', 'team': 'Team', 'member': 'Member1'}
+    for e in entities:
+        selected = [c for c in contests if required[e] in store.info(c)['columns']]
+        if not selected:
+            continue
+        ids = [store.contest_ids[c] for c in selected]
+        bounds = [(int(store.contest_offsets[i]), int(store.contest_offsets[i + 1])) for i in ids]
+        rows = np.concatenate([np.arange(start, end) for start, end in bounds])
+        group = np.repeat(np.arange(len(selected)), [end - start for start, end in bounds])
+        key, names = entity_keys(store, rows, e)
+        width = len(key) // len(rows)
+        group = np.repeat(group, width)
+        solved = np.repeat(np.asarray(store.columns['solved'][rows]), width)
+        penalty = np.repeat(np.asarray(store.columns['penalty'][rows]), width)
+
+        kept, rank = lexicographic_ranks(group, key, solved, penalty)
+        offsets = np.searchsorted(group[kept], np.arange(len(selected) + 1))
+        for j, contest in enumerate(selected):
+            part = slice(offsets[j], offsets[j + 1])
+            result[contest][e] = ([names[k] for k in key[kept[part]]], rank[part])
+    return result
+
+if __name__ == '__main__':
+    store = open_store()
+    ranks = store_entity_ranks(store, store.contests, ['school', 'team', 'member'])
+    total = {e: sum(len(r[e][0]) for r in ranks.values() if e in r) for e in ('school', 'team', 'member')}
+    print(f"{len(ranks)} 场比赛: " + ', '.join(f"{e} {n} 条名次" for e, n in total.items()))
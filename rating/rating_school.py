@@ -1,109 +1,139 @@
-import pandas as pd
-import math
-import re
-from opencc import OpenCC
+import numpy as np
 import os
+import sys
+import pickle
 from tqdm import tqdm
-from rating_utils import calculateRating
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from school_resolver import load_index
+from contest_store import open_store
+from contest_meta import load_catalog, rating_order
+from rating_utils import RatingState, calculateRatingArray
+from instrument import span
+from rating_ranks import store_entity_ranks
+from rating_history import history_path, build_history, write_history, to_wide
 
-def normalize(s):
-    s = str(s)
-    s = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9]', '', s)
-    s = s.lower()
-    if '港' in s or '澳' in s:
-        s = OpenCC('t2s').convert(s)
-    return s
+CHECKPOINT_PATH = 'rating/checkpoint.pkl'
+CHECKPOINT_VERSION = 4
+ENTITIES = ['school', 'team', 'member']
+ENTITY_NAMES = {'school': '学校', 'team': '队伍', 'member': '队员'}
 
-df = pd.read_csv('school.csv')
-alt_zh = {}
-for i, row in df.iterrows():
-    if row.isnull().all():
-        continue
-    zh = normalize(row['zh'])
-    en = normalize(row['en'])
-    alts = row["alt"].split(',') if pd.notna(row["alt"]) else []
-    alts = [normalize(alt.strip()) for alt in alts if alt.strip()]
-    alt_zh[en] = zh
-    for alt in alts:
-        alt_zh[alt] = zh
+def load_checkpoints(path, salt=None):
+    '''
+    读取每场比赛后的快照，返回 (checkpoints, names)
+    checkpoints: [(contest, csv_hash, state), ...]，state 为 {entity: (ids, ranks, ratings)}，
+    三个等长的 int32 数组依次为参赛者编号、名次和赛后rating；没有School列而被跳过的比赛 state 为 None
+    names: {entity: 编号 -> 名称的列表}
+    school.csv、实体类型或快照格式变化时全部作废；salt 为 None 时不检查
+    '''
+    if not os.path.exists(path):
+        return [], {}
+    try:
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+    except Exception:
+        return [], {}
+    if data.get('version') != CHECKPOINT_VERSION or (salt is not None and data.get('salt') != salt):
+        return [], {}
+    return data['contests'], data['names']
+
+def save_checkpoints(path, salt, checkpoints, names):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'version': CHECKPOINT_VERSION, 'salt': salt, 'contests': checkpoints, 'names': names}, f)
+    os.replace(tmp_path, path)
+
+def load_contest_order(path='date.csv'):
+    '''按日期排序的比赛列表，同一天 CCPC 在前'''
+    catalog, _ = load_catalog(date_path=path)
+    return rating_order(catalog)
 
-def getSchool(s):
-    s = normalize(s)
-    if s in alt_zh:
-        s = alt_zh[s]
-    return s
-    
 
 if __name__ == "__main__":
-    df = pd.read_csv('date.csv')
-    df['date'] = pd.to_datetime(df['date'], format='%Y/%m/%d')
-    df['type'] = df['contest'].apply(lambda x: 'ICPC' if 'ICPC' in x else 'CCPC')
-    df['priority'] = df['type'].map({'CCPC': 0, 'ICPC': 1})
-    sorted_df = df.sort_values(by=['date', 'priority'], ascending=[True, True])
-    sorted_contests = sorted_df['contest'].tolist()
-    
+    # --full 时忽略快照，从头计算；--csv 时额外导出学校宽表 rating_school.csv
+    # --entities 指定要计算的实体类型，默认为全部
+    entities = ENTITIES
+    for arg in sys.argv[1:]:
+        if arg.startswith('--entities='):
+            entities = [e for e in arg.split('=', 1)[1].split(',') if e]
+    assert set(entities) <= set(ENTITIES), f"未知的实体类型: {entities}"
+
+    sorted_contests = load_contest_order()
+    salt = (load_index()['key'][1], tuple(entities))
+    checkpoints, names = ([], {}) if '--full' in sys.argv[1:] else load_checkpoints(CHECKPOINT_PATH, salt)
+
+    # 所有榜单只在比赛存储中解析一次
+    store = open_store()
+
     # 初始化数据结构
-    current_ratings = {}  # 当前所有学校的rating
+    # 各类实体的编号表和当前rating；沿用快照的编号表，快照中未复用的比赛里的名称保持初始rating
+    states = {e: RatingState(names.get(e, ())) for e in entities}
     valid_contests = []    # 有效的比赛名称列表
-    valid_contests_ratings = []  # 每场有效比赛后的rating状态
+    valid_contests_states = []  # 每场有效比赛参赛者的 (编号, 名次, 赛后rating)
+    new_checkpoints = []   # 本次运行的快照
+
+    # 与快照一致的前缀直接复用，其余比赛的排名一次性批量计算
+    contests = [contest for contest in sorted_contests if contest in store.contest_ids]
+    reused = 0
+    while (reused < min(len(contests), len(checkpoints)) and
+           checkpoints[reused][:2] == (contests[reused], store.info(contests[reused])['hash'])):
+        reused += 1
+    pending = [contest for contest in contests[reused:] if 'School' in store.info(contest)['columns']]
+    with span('contest_ranks', contests=len(pending)) as s:
+        contest_ranks = store_entity_ranks(store, pending, entities)
+        s.rows = sum(len(r[0]) for ranks in contest_ranks.values() for r in ranks.values())
     
     # 遍历每一场比赛
-    for contest in tqdm(sorted_contests):
-        path = f'./csv/{contest}.csv'
-        if not os.path.exists(path):
+    for i, contest in enumerate(tqdm(contests)):
+        if i < reused:
+            # 比赛及其之前的所有比赛都未变化，直接使用快照
+            new_checkpoints.append(checkpoints[i])
+            state = checkpoints[i][2]
+            if state is not None:
+                for e, (ids, _, ratings) in state.items():
+                    states[e].ratings[ids] = ratings
+                valid_contests.append(contest)
+                valid_contests_states.append(state)
             continue
-            
-        df = pd.read_csv(path)
-        if 'School' not in df.columns:
+
+        csv_hash = store.info(contest)['hash']
+        if contest not in contest_ranks:
+            new_checkpoints.append((contest, csv_hash, None))
             continue
-            
-        # 处理数据
-        df = df.dropna(how='all')
-        df = df[['School', 'Solved', 'Penalty']]
-        df['School'] = df['School'].apply(getSchool)
-        # df = df[df['School'] != '']  # 移除非法的空学校名称
-        df['Score'] = df['Solved'] * 1000000 - df['Penalty']
-        df = df.sort_values(by='Score', ascending=False)
-        df = df.drop_duplicates(subset='School', keep='first')
-        df['School Rank'] = df['Score'].rank(method='min', ascending=False).astype(int)
-        
-        # 创建排名字典
-        userRank = dict(zip(df['School'], df['School Rank']))
-        
-        # 确保所有参赛学校都有初始Rating
-        for school in userRank.keys():
-            if school not in current_ratings:
-                current_ratings[school] = 1400  # 初始Rating
-        
-        # 计算新的rating
-        new_ratings = calculateRating(userRank, current_ratings.copy())
-        
-        # 更新当前rating
-        current_ratings.update(new_ratings)
+
+        state = {}
+        for e, (keys, rank) in contest_ranks[contest].items():
+            # 新参赛者分配编号，初始Rating为1400
+            ids = states[e].intern(keys)
+
+            # 计算新的rating，并更新当前rating
+            with span('calculate_rating', contest=contest, entity=e) as s:
+                ratings = calculateRatingArray(rank, states[e].ratings[ids])
+                s.rows = len(ids)
+            states[e].ratings[ids] = ratings
+            state[e] = (ids.astype(np.int32), rank.astype(np.int32), ratings.astype(np.int32))
         
-        # 记录有效比赛和比赛后的rating状态
+        # 记录有效比赛和参赛者的新rating
         valid_contests.append(contest)
-        valid_contests_ratings.append(current_ratings.copy())
-    
-    # 收集所有出现过学校
-    all_schools = set()
-    for ratings in valid_contests_ratings:
-        all_schools.update(ratings.keys())
-    all_schools = sorted(list(all_schools))
-    
-    # 构建结果表（修改部分：首次参赛前显示1400）
-    result_data = []
-    for school in all_schools:
-        row = [school]
-        # 遍历每场比赛
-        for ratings in valid_contests_ratings:
-            if school in ratings:
-                row.append(float(ratings[school]))
-            else:
-                row.append(1400.0)  # 首次参赛前显示1400
-        result_data.append(row)
+        valid_contests_states.append(state)
+        new_checkpoints.append((contest, csv_hash, state))
+
+    # 保存快照，供下次增量计算
+    save_checkpoints(CHECKPOINT_PATH, salt, new_checkpoints, {e: states[e].table.names for e in entities})
     
-    # 创建最终DataFrame并保存
-    result_df = pd.DataFrame(result_data, columns=['School'] + valid_contests)
-    result_df.to_csv('rating/rating_school.csv', index=False, encoding='utf-8-sig')
-    print(f"成功保存学校Rating数据到 rating_school.csv (包含{len(valid_contests)}场有效比赛)")
\ No newline at end of file
+    # 保存稀疏的长表历史：每个 (实体, contest) 参赛记录一行
+    for e in entities:
+        empty = (np.array([], dtype=np.int32),) * 3
+        arrays = [state.get(e, empty) for state in valid_contests_states]
+        history = build_history(valid_contests, states[e].table.names,
+                                [a[0] for a in arrays], [a[1] for a in arrays], [a[2] for a in arrays],
+                                key=e)
+        with span('write_history', entity=e) as s:
+            write_history(history, history_path(e))
+            s.rows = len(history)
+        print(f"成功保存{ENTITY_NAMES[e]}Rating历史到 {history_path(e)} (包含{len(valid_contests)}场有效比赛, {len(history)}条记录)")
+
+        # 按需导出宽表（首次参赛前显示1400）
+        if e == 'school' and '--csv' in sys.argv[1:]:
+            result_df = to_wide(history)
+            result_df.to_csv('rating/rating_school.csv', index=False, encoding='utf-8-sig')
+            print(f"成功保存学校Rating数据到 rating_school.csv (包含{len(valid_contests)}场有效比赛)")
@@ -0,0 +1,98 @@
+import os
+import sys
+import json
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from contest_store import open_store
+from rating_utils import IdTable
+from rating_school import load_contest_order
+from rating_ranks import store_entity_ranks
+from rating_models import MODELS, replay
+
+# 子进程中的比赛序列，每个进程只接收一次
+_contests = None
+
+def load_contests(entity='school'):
+    '''
+    按 rating_school.py 的顺序得到有效比赛的 (编号, 名次) 序列
+    返回 (contests, 实体数)
+    '''
+    store = open_store()
+    names = [c for c in load_contest_order()
+             if c in store.contest_ids and 'School' in store.info(c)['columns']]
+    ranks = store_entity_ranks(store, names, [entity])
+    table = IdTable()
+    contests = [(table.intern_many(ranks[c][entity][0]), ranks[c][entity][1]) for c in names if entity in ranks[c]]
+    return contests, len(table)
+
+def _init_worker(contests):
+    global _contests
+    _contests = contests
+
+def evaluate(config):
+    '''在比赛序列上重放一组参数，返回参数与评估结果'''
+    contests, size = _contests
+    model = MODELS[config['model']](**config['params'])
+    return dict(config, **replay(model, contests, size, config['warmup']))
+
+def parse_value(value):
+    if value.lower() in ('true', 'false'):
+        return value.lower() == 'true'
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+def parse_grid(specs):
+    '''['scale=300,400', 'top=2,4'] -> [{'scale': 300, 'top': 2}, ...]（笛卡尔积）'''
+    keys, values = [], []
+    for spec in specs:
+        key, _, options = spec.partition('=')
+        keys.append(key.strip())
+        values.append([parse_value(v.strip()) for v in options.split(',') if v.strip()])
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+def run_sweep(model, grid, entity='school', warmup=10, jobs=None):
+    '''并行评估参数网格，返回按准确率从高到低排列的结果列表'''
+    unknown = {key for params in grid for key in params} - set(MODELS[model].defaults)
+    assert not unknown, f"{model} 没有参数: {', '.join(sorted(unknown))}"
+    for params in grid:
+        # 在加载数据、启动子进程之前检查参数取值
+        MODELS[model](**params)
+    data = load_contests(entity)
+    configs = [{'model': model, 'params': params, 'warmup': warmup} for params in grid]
+    if jobs == 1 or len(configs) <= 1:
+        _init_worker(data)
+        results = [evaluate(config) for config in tqdm(configs, desc="Sweeping")]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(data,)) as executor:
+            results = list(tqdm(executor.map(evaluate, configs), total=len(configs), desc="Sweeping"))
+    return sorted(results, key=lambda r: -r['accuracy'])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='在比赛历史上并行评估rating模型的参数网格')
+    parser.add_argument('model', choices=sorted(MODELS), help='rating模型')
+    parser.add_argument('--grid', action='append', default=[], metavar='PARAM=V1,V2,...',
+                        help='参数及其候选值，可重复；未指定的参数取默认值')
+    parser.add_argument('--entity', default='school', help='实体类型（school/team/member）')
+    parser.add_argument('--warmup', type=int, default=10, help='前若干场比赛只更新不计分')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='并行进程数（默认为CPU核数，1为串行）')
+    parser.add_argument('--output', default=None, help='结果 JSON 路径')
+    args = parser.parse_args()
+
+    results = run_sweep(args.model, parse_grid(args.grid), args.entity, args.warmup, args.jobs)
+    print(f"{'accuracy':>9} {'mean':>7}  params（{results[0]['contests']} 场比赛计分）")
+    for r in results:
+        params = ', '.join(f'{k}={v}' for k, v in r['params'].items()) or '默认参数'
+        print(f"{r['accuracy']:>9.4f} {r['mean_accuracy']:>7.4f}  {params}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
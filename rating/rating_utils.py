@@ -1,7 +1,9 @@
 import math
-import re
 import os
-from opencc import OpenCC
+import sys
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from school_resolver import normalize
 
 def calcSeed(ratingToCounts, rating, prev=None):
     if prev == None:
@@ -12,8 +14,194 @@ def calcSeed(ratingToCounts, rating, prev=None):
     seed -= 1.0 / (1 + math.pow(10, (rating - prev) / 400))
     return seed
 
+# Elo 胜率表：按 scale 分别缓存，table[d + offset] = 1 / (1 + 10^(d/scale))
+_eloTables = {}
+
+def eloWinProbability(d, scale=400):
+    '''rating 低 d 的一方获胜的概率；scale 很小时 10^(d/scale) 溢出，此时概率为 0'''
+    try:
+        return 1.0 / (1 + math.pow(10, d / scale))
+    except OverflowError:
+        return 0.0
+
+def eloTable(lo, hi, scale=400):
+    '''
+    返回覆盖整数差值区间 [lo, hi] 的胜率表及其偏移量
+    scale 为 400 时表中的值与 calcSeed 中的 math.pow 计算结果完全一致；scale 很小时两端饱和为 0/1
+    '''
+    table, offset = _eloTables.get(scale, (None, 0))
+    if table is None or lo < -offset or hi >= len(table) - offset:
+        if table is not None:
+            lo = min(lo, -offset)
+            hi = max(hi, len(table) - offset - 1)
+        lo = min(lo, -16000)
+        hi = max(hi, 16000)
+        table = np.array([eloWinProbability(d, scale) for d in range(lo, hi + 1)])
+        offset = -lo
+        _eloTables[scale] = (table, offset)
+    return table, offset
+
+def calcSeeds(ratings, counts, cand, prev):
+    '''
+    对一组候选 rating 同时计算 calcSeed(ratingToCounts, cand, prev)
+    ratings/counts: 按首次出现顺序排列的不同 rating 及其人数
+    按 ratings 的顺序逐项累加，保证与 calcSeed 的浮点结果逐位相同
+    '''
+    table, offset = eloTable(int(min(cand.min(), prev.min()) - ratings.max()),
+                             int(max(cand.max(), prev.max()) - ratings.min()))
+    terms = np.empty((len(cand), len(ratings) + 1))
+    terms[:, 0] = 1
+    terms[:, 1:] = counts[None, :] * table[cand[:, None] - ratings[None, :] + offset]
+    seed = np.cumsum(terms, axis=1)[:, -1]
+    return seed - table[cand - prev + offset]
+
+class SeedCache:
+    '''
+    一场比赛内的种子缓存：calcSeed(ratingToCounts, cand, prev) = sum(cand) - 胜率(cand - prev)
+    sum(cand) 只与候选 rating 有关，每个不同的候选值只计算一次；胜率表在整个重放过程中共用
+    '''
+    def __init__(self, ratings, counts, scale=400):
+        self.ratings = ratings
+        self.counts = counts
+        self.scale = scale
+        self.lo = min(int(ratings.min()), 1)
+        self.sums = np.full(max(int(ratings.max()), 8000) - self.lo + 1, np.nan)
+
+    def seeds(self, cand, prev):
+        '''与 calcSeeds(ratings, counts, cand, prev) 逐位相同'''
+        table, offset = eloTable(int(min(cand.min(), prev.min()) - self.ratings.max()),
+                                 int(max(cand.max(), prev.max()) - self.ratings.min()), self.scale)
+        index = cand - self.lo
+        missing = np.unique(index[np.isnan(self.sums[index])])
+        if len(missing):
+            values = missing + self.lo
+            terms = np.empty((len(values), len(self.ratings) + 1))
+            terms[:, 0] = 1
+            terms[:, 1:] = self.counts[None, :] * table[values[:, None] - self.ratings[None, :] + offset]
+            self.sums[missing] = np.cumsum(terms, axis=1)[:, -1]
+        return self.sums[index] - table[cand - prev + offset]
+
+class IdTable:
+    '''名称与连续整数编号的双向映射，编号按首次出现的顺序分配'''
+    def __init__(self, names=()):
+        self.names = list(names)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name):
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+    def intern_many(self, names):
+        return np.fromiter((self.intern(name) for name in names), dtype=np.int64, count=len(names))
+
+class RatingState:
+    '''
+    一类实体的当前rating：名称编号表 + 按编号存放的rating数组
+    数组预分配并按需倍增，未参赛的编号为初始rating
+    '''
+    def __init__(self, names=(), initial=1400):
+        self.table = IdTable(names)
+        self.initial = initial
+        self.ratings = np.full(max(len(self.table), 1024), initial, dtype=np.int64)
+
+    def intern(self, names):
+        '''将名称转为编号，新名称的rating为初始值'''
+        ids = self.table.intern_many(names)
+        if len(self.table) > len(self.ratings):
+            ratings = np.full(max(len(self.table), 2 * len(self.ratings)), self.initial, dtype=np.int64)
+            ratings[:len(self.ratings)] = self.ratings
+            self.ratings = ratings
+        return ids
+
+    def copy(self):
+        state = RatingState.__new__(RatingState)
+        state.table = IdTable(self.table.names)
+        state.initial = self.initial
+        state.ratings = self.ratings.copy()
+        return state
+
+def calculateRatingArray(rank, rating, scale=400, top=4, apply_inc=False, max_drop=10):
+    '''
+    rank/rating: 按参赛者顺序排列的名次和当前rating（整数数组）
+    返回同顺序的新rating数组，所有用户的二分同时进行
+    scale: Elo 胜率的尺度；top: 第二次调整统计的前 top*sqrt(n) 名；
+    apply_inc: 是否应用第二次调整（原实现计算后未使用），调整幅度不超过 max_drop
+    参数为默认值时与 calculateRatingNaive 结果逐位相同
+    '''
+    userCount = len(rank)
+    if userCount == 0:
+        return np.array([], dtype=np.int64)
+    rank = np.asarray(rank, dtype=np.int64)
+    rating = np.asarray(rating, dtype=np.int64)
+
+    # 与 ratingToCounts 的插入顺序一致：按首次出现的顺序排列不同的 rating
+    values, first, counts = np.unique(rating, return_index=True, return_counts=True)
+    order = np.argsort(first)
+    values, counts = values[order], counts[order]
+
+    cache = SeedCache(values, counts, scale)
+    M = np.sqrt(cache.seeds(rating, rating) * rank)
+    l = np.ones(userCount, dtype=np.int64)
+    r = np.full(userCount, 8000, dtype=np.int64)
+    active = l < r - 1
+    while active.any():
+        m = (l[active] + r[active]) // 2
+        less = cache.seeds(m, rating[active]) < M[active]
+        idx = np.flatnonzero(active)
+        r[idx[less]] = m[less]
+        l[idx[~less]] = m[~less]
+        active = l < r - 1
+    delta = np.trunc((l - rating) / 2.0).astype(np.int64)
+
+    # 第一次调整：确保总和为负
+    inc = -(int(delta.sum()) // userCount) - 1
+    delta += inc
+
+    # 第二次调整前，按 Rating 从高到低排序（稳定排序，与 sorted(reverse=True) 一致）
+    order = np.argsort(-rating, kind='stable')
+    s = int(min(userCount, top * round(math.sqrt(userCount))))
+    if apply_inc and s > 0:
+        sum_top = int(delta[order[:s]].sum())
+        delta += min(max(-1 * (sum_top // s), -max_drop), 0)
+
+    return rating + delta
+
 def calculateRating(userRank, currentRatings):
     '''
+    userRank: dict {user:rank}
+    currentRatings: dict {user:rating}
+    calculateRatingArray 的 dict 接口，与 calculateRatingNaive 结果逐位相同
+    '''
+    userCount = len(userRank)
+    if userCount == 0:
+        return {}
+
+    userList = list(userRank.keys())
+    for user in userList:
+        if user not in currentRatings:
+            currentRatings[user] = 1400
+    rating = np.array([currentRatings[user] for user in userList])
+    if rating.dtype.kind != 'i':
+        # 非整数 rating 无法查表，退回原始实现
+        return calculateRatingNaive(userRank, currentRatings)
+    rank = np.array([userRank[user] for user in userList], dtype=np.int64)
+    new_rating = calculateRatingArray(rank, rating)
+
+    returnValue = {}
+    for i in np.argsort(-rating, kind='stable'):
+        returnValue[userList[i]] = int(new_rating[i])
+    return returnValue
+
+def calculateRatingNaive(userRank, currentRatings):
+    '''
+    逐个用户二分的原始实现，保留用于校验 calculateRating 的结果
+
     userRank: dict {user:rank}
     currentRatings: dict {user:rating}
     '''
@@ -79,14 +267,6 @@ def calculateRating(userRank, currentRatings):
         
     return returnValue
 
-def normalize(s, t2s=False):
-    s = str(s)
-    s = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9]', '', s)
-    s = s.lower()
-    if t2s == True or '港' in s or '澳' in s:
-        s = OpenCC('t2s').convert(s)
-    return s
-
 def rating_color(rating):
     if not rating:
         return 'color:#000000;'
@@ -0,0 +1,126 @@
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from tqdm import tqdm
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from rating_utils import RatingState, calculateRatingArray
+from rating_school import CHECKPOINT_PATH, load_checkpoints
+
+# 子进程中的快照，每个进程只读取一次
+_base = None
+
+def load_base(path=CHECKPOINT_PATH, entity='school'):
+    '''
+    由快照得到基准数据：有效比赛列表、编号表，以及每场比赛参赛者的编号、名次和赛后rating
+    返回 (contests, names, [(ids, ranks, ratings), ...])
+    '''
+    checkpoints, names = load_checkpoints(path)
+    assert checkpoints, f"快照不存在或已失效，请先运行 rating_school.py: {path}"
+    contests, arrays = [], []
+    for contest, _, state in checkpoints:
+        if state is None or entity not in state:
+            continue
+        contests.append(contest)
+        arrays.append(state[entity])
+    return contests, names[entity], arrays
+
+def _init_worker(path, entity):
+    global _base
+    _base = load_base(path, entity)
+
+def simulate(scenario, base=None):
+    '''
+    在基准快照上模拟一个假设情景，返回最终rating相对基准的变化 {key: delta}
+    scenario: {'name': 名称,
+               'exclude': [不计入的比赛, ...],
+               'ranks': {比赛: {key: 名次}}}
+    名次覆盖只修改指定学校的名次，其他学校不变（允许并列）；不在该场比赛中的学校视为新增参赛
+    第一个受影响的比赛之前的rating直接由快照得到，只重放之后的比赛
+    '''
+    contests, names, arrays = base or _base
+    exclude = set(scenario.get('exclude', []))
+    overrides = scenario.get('ranks', {})
+    unknown = (exclude | set(overrides)) - set(contests)
+    assert not unknown, f"未知的比赛: {', '.join(sorted(unknown))}"
+
+    affected = [i for i, contest in enumerate(contests) if contest in exclude or contest in overrides]
+    start = affected[0] if affected else len(contests)
+    state = RatingState(names)
+    for ids, _, ratings in arrays[:start]:
+        state.ratings[ids] = ratings
+    baseline = state.ratings.copy()
+    for ids, _, ratings in arrays[start:]:
+        baseline[ids] = ratings
+
+    for i in range(start, len(contests)):
+        contest = contests[i]
+        if contest in exclude:
+            continue
+        ids, rank, _ = arrays[i]
+        ids, rank = ids.astype(np.int64), rank.astype(np.int64)
+        if contest in overrides:
+            override_ids = state.intern(list(overrides[contest]))
+            override_ranks = np.array([int(r) for r in overrides[contest].values()], dtype=np.int64)
+            # 已参赛的学校原位修改名次，新增的学校追加在最后
+            position = {user: k for k, user in enumerate(ids.tolist())}
+            rank = rank.copy()
+            extra = []
+            for user, r in zip(override_ids.tolist(), override_ranks.tolist()):
+                if user in position:
+                    rank[position[user]] = r
+                else:
+                    extra.append((user, r))
+            if extra:
+                ids = np.concatenate([ids, [user for user, _ in extra]])
+                rank = np.concatenate([rank, [r for _, r in extra]])
+        state.ratings[ids] = calculateRatingArray(rank, state.ratings[ids])
+
+    n = len(state.table)
+    if len(baseline) < n:
+        baseline = np.concatenate([baseline, np.full(n - len(baseline), state.initial)])
+    changed = np.flatnonzero(state.ratings[:n] != baseline[:n])
+    deltas = {state.table.names[i]: int(state.ratings[i] - baseline[i]) for i in changed}
+    return dict(sorted(deltas.items(), key=lambda item: (-abs(item[1]), item[0])))
+
+def run_scenarios(scenarios, path=CHECKPOINT_PATH, entity='school', jobs=None):
+    '''并行模拟多个情景，返回与 scenarios 顺序一致的 [{key: delta}, ...]'''
+    if jobs == 1 or len(scenarios) <= 1:
+        base = load_base(path, entity)
+        return [simulate(scenario, base) for scenario in tqdm(scenarios, desc="Simulating")]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(path, entity)) as executor:
+        return list(tqdm(executor.map(simulate, scenarios, chunksize=4), total=len(scenarios), desc="Simulating"))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='基于rating快照模拟假设情景')
+    parser.add_argument('scenarios', nargs='?', help='情景 JSON 文件：[{"name", "exclude", "ranks"}, ...]')
+    parser.add_argument('--each-contest', action='store_true', help='依次去掉每一场比赛，各作为一个情景')
+    parser.add_argument('--entity', default='school', help='实体类型（school/team/member）')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='并行进程数（默认为CPU核数，1为串行）')
+    parser.add_argument('--output', default=None, help='结果 JSON 路径，默认只打印摘要')
+    parser.add_argument('--top', type=int, default=5, help='摘要中每个情景显示的变化最大的条目数')
+    args = parser.parse_args()
+
+    scenarios = []
+    if args.scenarios:
+        with open(args.scenarios, 'r', encoding='utf-8') as f:
+            scenarios = json.load(f)
+    if args.each_contest:
+        contests = load_base(entity=args.entity)[0]
+        scenarios += [{'name': f'exclude {contest}', 'exclude': [contest]} for contest in contests]
+    if not scenarios:
+        parser.error('需要情景文件或 --each-contest')
+
+    results = run_scenarios(scenarios, entity=args.entity, jobs=args.jobs)
+    for i, (scenario, deltas) in enumerate(zip(scenarios, results)):
+        name = scenario.get('name', f'#{i}')
+        total = sum(abs(delta) for delta in deltas.values())
+        top = ', '.join(f'{key} {delta:+d}' for key, delta in list(deltas.items())[:args.top])
+        print(f"{name}: {len(deltas)} 个变化, 总变化 {total}; {top}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump([{'scenario': s, 'deltas': d} for s, d in zip(scenarios, results)], f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
@@ -1,11 +1,44 @@
 import pandas as pd
+import numpy as np
 import re
 import sys
+from pandas.io.parsers import TextParser
+from problem_cells import problem_columns, convert_rl_cells
+from instrument import span, begin
 
-if __name__ == '__main__':
-    name = sys.argv[1]
-    df = pd.read_excel(f'{name}.xlsx', sheet_name='Official')
+# 流式模式下每批转换、写出的行数
+BATCH_SIZE = 1000
+
+# 处理Rank和Medal列
+def split_rank_medal(value):
+    if pd.isna(value):
+        return None, ""
+    value_str = str(value)
+    if '(' in value_str:
+        rank_part, medal_part = value_str.split('(', 1)
+        rank = rank_part.strip()
+        medal = medal_part.replace(')', '').strip()
+    else:
+        rank = value_str.strip()
+        medal = ""
+    return rank, medal
 
+# 使用Time列计算Penalty（新方法）
+def convert_time_to_minutes(time_str):
+    if pd.isna(time_str) or time_str == '':
+        return 0
+    parts = str(time_str).split(':')
+    if len(parts) < 2:
+        return 0
+    try:
+        hours = int(parts[0])
+        minutes = int(parts[1])
+        return hours * 60 + minutes
+    except:
+        return 0
+
+def convert_official(df):
+    '''将 Official 工作表转换为 Rank, Medal, School, Team, Solved, Penalty, A..M 的标准格式'''
     # 清理列名：去除括号及其内容
     new_columns = []
     for col in df.columns:
@@ -15,20 +48,6 @@ if __name__ == '__main__':
             new_columns.append(col)
     df.columns = new_columns
 
-    # 处理Rank和Medal列
-    def split_rank_medal(value):
-        if pd.isna(value):
-            return None, ""
-        value_str = str(value)
-        if '(' in value_str:
-            rank_part, medal_part = value_str.split('(', 1)
-            rank = rank_part.strip()
-            medal = medal_part.replace(')', '').strip()
-        else:
-            rank = value_str.strip()
-            medal = ""
-        return rank, medal
-
     rank_medal = df['#'].apply(split_rank_medal)
     df['Rank'] = [rm[0] for rm in rank_medal]
     df['Medal'] = [rm[1] for rm in rank_medal]
@@ -40,20 +59,6 @@ if __name__ == '__main__':
         'Score': 'Solved'
     }, inplace=True)
 
-    # 使用Time列计算Penalty（新方法）
-    def convert_time_to_minutes(time_str):
-        if pd.isna(time_str) or time_str == '':
-            return 0
-        parts = str(time_str).split(':')
-        if len(parts) < 2:
-            return 0
-        try:
-            hours = int(parts[0])
-            minutes = int(parts[1])
-            return hours * 60 + minutes
-        except:
-            return 0
-
     df['Penalty'] = df['Time'].apply(convert_time_to_minutes)
 
     # 删除不需要的列
@@ -66,46 +71,132 @@ if __name__ == '__main__':
     # df['Penalty'] = 0
 
     # 识别题目列（A到M）
-    problem_cols = [col for col in df.columns if len(col) == 1 and 'A' <= col <= 'M']
-
-    # 处理每个题目列
-    for col in problem_cols:
-        for idx in df.index:
-            val = df.at[idx, col]
-            if pd.isna(val) or val == '':
-                continue  # 保持空值不变
-                
-            # 处理RJ格式
-            if val.startswith('RJ'):
-                parts = val.split('/')
-                if len(parts) >= 2:
-                    attempts = parts[1]
-                    df.at[idx, col] = f'-{attempts}'
-                    
-            # 处理AC/FB格式
-            elif any(val.startswith(prefix) for prefix in ['AC/', 'FB/']):
-                parts = val.split('/')
-                if len(parts) >= 3:
-                    attempts = parts[1]
-                    time_part = parts[2]
-                    
-                    # 解析时间
-                    time_parts = time_part.split(':')
-                    if len(time_parts) >= 2:
-                        hours = int(time_parts[0])
-                        minutes = int(time_parts[1])
-                        total_minutes = hours * 60 + minutes
-                        
-                        # 计算罚时贡献（原始方法，已注释）
-                        # penalty_contrib = total_minutes + (int(attempts) - 1) * 20
-                        # df.at[idx, 'Penalty'] += penalty_contrib
-                        
-                        # 更新单元格值
-                        df.at[idx, col] = f'+{attempts}({total_minutes})'
+    problem_cols = problem_columns(df.columns, last='M')
+
+    # 处理题目列：RJ/次数 -> -次数，AC/次数/h:mm 与 FB/次数/h:mm -> +次数(分钟)
+    # 罚时贡献（原始方法，已注释）：total_minutes + (attempts - 1) * 20
+    df[problem_cols] = convert_rl_cells(df[problem_cols])
 
     # 确定列顺序
     final_columns = ['Rank', 'Medal', 'School', 'Team', 'Solved', 'Penalty'] + problem_cols
-    df = df[final_columns]
+    return df[final_columns]
+
+def cell_value(cell):
+    '''与 pd.read_excel 的 openpyxl 引擎一致：空单元格为 ""，整数值的数字转为 int'''
+    if cell.value is None:
+        return ""
+    if cell.data_type == 'e':
+        return np.nan
+    if cell.data_type == 'n':
+        value = int(cell.value)
+        return value if value == cell.value else float(cell.value)
+    return cell.value
+
+def iter_sheet_rows(path, sheet_name='Official'):
+    '''
+    以只读模式逐行读取工作表，去掉行尾的空单元格
+    中间的空行保留为 []，末尾的空行与 pd.read_excel 一样丢弃
+    '''
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = wb[sheet_name]
+        sheet.reset_dimensions()
+        blank = 0
+        for row in sheet.rows:
+            values = [cell_value(cell) for cell in row]
+            while values and values[-1] == "":
+                values.pop()
+            if not values:
+                blank += 1
+                continue
+            for _ in range(blank):
+                yield []
+            blank = 0
+            yield values
+    finally:
+        wb.close()
+
+def iter_batches(path, width=0, dtype=None, batch_size=BATCH_SIZE):
+    '''
+    每次解析 batch_size 行，返回与 pd.read_excel 相同列名的 DataFrame
+    各行补齐到 width 列（不足时按本批最宽的行）；dtype 为整张表各列的类型，保证每批的类型推断与一次读入时一致
+    没有数据行时产出一个空表
+    '''
+    rows = iter_sheet_rows(path)
+    header = next(rows, [])
+
+    def parse(batch):
+        n = max([width, len(header)] + [len(row) for row in batch])
+        batch = [row + [""] * (n - len(row)) for row in [header] + batch]
+        return TextParser(batch, header=0, dtype=dtype, skip_blank_lines=False).read()
+
+    batch, empty = [], True
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield parse(batch)
+            batch, empty = [], False
+    if batch or empty:
+        yield parse(batch)
+
+def scan_dtypes(path, batch_size=BATCH_SIZE):
+    '''
+    第一遍读取：得到表格宽度和整列的类型
+    各批类型相同时沿用；均为数值时为 float64（含空值的整数列）；否则按 object 保留原值
+    某批中没有的列（该批的行都较短）在整张表中为空值，按 float64 计
+    '''
+    seen, batches, width = {}, 0, 0
+    for df in iter_batches(path, batch_size=batch_size):
+        batches += 1
+        width = max(width, len(df.columns))
+        for col, dtype in df.dtypes.items():
+            seen.setdefault(col, []).append(dtype)
+    dtypes = {}
+    for col, kinds in seen.items():
+        kinds = set(kinds) | ({np.dtype(np.float64)} if len(kinds) < batches else set())
+        if len(kinds) == 1:
+            dtypes[col] = kinds.pop()
+        elif all(pd.api.types.is_numeric_dtype(kind) and not pd.api.types.is_bool_dtype(kind) for kind in kinds):
+            dtypes[col] = np.float64
+        else:
+            dtypes[col] = object
+    return width, dtypes
+
+def stream_official(path, output_path, batch_size=BATCH_SIZE):
+    '''
+    分两遍流式转换：第一遍只统计各列类型，第二遍按批解析、转换并追加写出
+    内存占用只与 batch_size 有关，输出与一次读入整张表的结果逐字节一致
+    '''
+    with span('dtype_scan', file=path):
+        width, dtypes = scan_dtypes(path, batch_size)
+    rows = 0
+    with open(output_path, 'w', encoding='utf-8-sig', newline='') as f:
+        for i, df in enumerate(iter_batches(path, width, dtypes, batch_size)):
+            with span('batch_convert', file=path) as s:
+                df = convert_official(df)
+                df.to_csv(f, index=False, header=i == 0)
+                s.rows = len(df)
+            rows += len(df)
+    return rows
+
+if __name__ == '__main__':
+    name = sys.argv[1]
+    # --output=PATH 指定输出路径，默认为 {name}.csv
+    output_path = next((arg.split('=', 1)[1] for arg in sys.argv[2:] if arg.startswith('--output=')), f'{name}.csv')
+    if '--stream' in sys.argv[2:]:
+        # 流式模式：按批读取和写出，内存占用与榜单大小无关
+        stream_official(f'{name}.xlsx', output_path)
+        sys.exit(0)
+
+    with span('excel_read', file=f'{name}.xlsx') as s:
+        df = pd.read_excel(f'{name}.xlsx', sheet_name='Official')
+        s.rows = len(df)
+    cleanup = begin('sheet_cleanup', file=f'{name}.xlsx')
+    df = convert_official(df)
+    cleanup.end(rows=len(df))
 
     # 保存为CSV文件
-    df.to_csv(f'{name}.csv', index=False, encoding='utf-8-sig')
\ No newline at end of file
+    with span('csv_write', file=output_path) as s:
+        df.to_csv(output_path, index=False, encoding='utf-8-sig')
+        s.rows = len(df)
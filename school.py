@@ -1,46 +1,28 @@
-import pandas as pd
-import os
-import re
-from opencc import OpenCC
+from instrument import span
 
-def normalize(s):
-    s = str(s)
-    s = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9]', '', s)
-    s = s.lower()
-    if '港' in s or '澳' in s:
-        s = OpenCC('t2s').convert(s)
-    return s
+def school_occurrences(store):
+    '''各比赛中出现的（规范化后的）原始学校名：{学校名: [(文件名, 行号), ...]}，按比赛存储中的顺序'''
+    occurrences = {}
+    for contest in store.contests:
+        if 'School' in store.info(contest)['columns']:
+            with span('school_scan', contest=contest) as s:
+                df = store.contest(contest)
+                for i, school in zip(df['row'], df['name']):
+                    occurrences.setdefault(school, []).append((f'{contest}.csv', i))
+                s.rows = len(df)
+    return occurrences
 
-df = pd.read_csv('school.csv')
-zh_en = {}
-en_zh = {}
-for i, row in df.iterrows():
-    if row.isnull().all():
-        continue
-    chn = normalize(row['zh'])
-    eng = normalize(row['en'])
-    alts = row["alt"].split(',') if pd.notna(row["alt"]) else []
-    alts = [normalize(alt.strip()) for alt in alts if alt.strip()]
-    zh_en[chn] = eng
-    en_zh[eng] = chn
-    for alt in alts:
-        if alt.encode('utf-8').isalpha():
-            en_zh[alt] = chn
-        else:
-            zh_en[alt] = eng
+def unknown_schools(index, occurrences):
+    '''不在别名索引（中文名、英文名及其别名）中的学校名，按名称排序'''
+    zh_en, en_zh = index['zh_en'], index['en_zh']
+    return {school: occurrences[school] for school in sorted(occurrences)
+            if school not in zh_en and school not in en_zh}
 
-notfound = {}
+def print_unknown(notfound):
+    for school, places in notfound.items():
+        print(f"{school}: {', '.join([f'{f}({i})' for f, i in places])}")
 
-for file in os.listdir('./csv'):
-    if file.endswith('.csv'):
-        df = pd.read_csv(os.path.join('./csv', file))
-        if 'School' in df.columns:
-            for i, row in df.iterrows():
-                if row.isnull().all():
-                    continue
-                school = normalize(row['School'])
-                if school not in zh_en and school not in en_zh:
-                    notfound[school] = notfound.get(school, []) + [(file, i)]
-
-for school in sorted(notfound):
-    print(f"{school}: {', '.join([f'{f}({i})' for f, i in notfound[school]])}")
\ No newline at end of file
+if __name__ == '__main__':
+    from school_resolver import load_index
+    from contest_store import open_store
+    print_unknown(unknown_schools(load_index(), school_occurrences(open_store())))
@@ -0,0 +1,168 @@
+import io
+import os
+import re
+import csv
+import argparse
+from collections import Counter
+from school_resolver import SCHOOL_CSV, load_index, normalize
+from contest_store import open_store
+
+CANDIDATES_PATH = 'school_candidates.csv'
+CANDIDATE_COLUMNS = ['name', 'count', 'rank', 'score', 'school', 'en', 'alias', 'accept']
+
+_chinese = re.compile('[\u4e00-\u9fff]')
+
+def ngrams(s):
+    '''
+    规范化名称的 n-gram 集合：含中文时取字符二元组，否则取三元组
+    首尾加标记，使短名称和前后缀也能参与匹配
+    '''
+    n = 2 if _chinese.search(s) else 3
+    s = f'^{s}$'
+    return {s[i:i + n] for i in range(max(len(s) - n + 1, 1))}
+
+class SchoolMatcher:
+    '''
+    基于 school.csv 别名表的模糊匹配，中英文名称及所有别名都建立 n-gram 倒排索引
+    查询时只取出现次数较少的 n-gram 的倒排表作为候选，再按 Dice 系数打分
+    '''
+    def __init__(self, index=None, max_postings=0.05):
+        index = index or load_index()
+        zh_en, en_zh, alt_zh = index['zh_en'], index['en_zh'], index['alt_zh']
+        # 别名 -> 规范的中文名
+        canonical = dict(alt_zh)
+        for zh, en in zh_en.items():
+            canonical.setdefault(zh, en_zh.get(en, zh))
+        self.en = {zh: en for zh, en in zh_en.items() if en_zh.get(en) == zh}
+        self.aliases = sorted(canonical)
+        self.schools = [canonical[alias] for alias in self.aliases]
+        self.grams = [ngrams(alias) for alias in self.aliases]
+        self.postings = {}
+        for i, grams in enumerate(self.grams):
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(i)
+        # 超过该长度的倒排表（如“大学”）只用于打分，不用于生成候选
+        self.max_postings = max(int(len(self.aliases) * max_postings), 1)
+
+    def candidates(self, grams):
+        lists = sorted((self.postings[g] for g in grams if g in self.postings), key=len)
+        rare = [postings for postings in lists if len(postings) <= self.max_postings]
+        ids = set()
+        for postings in rare or lists[:1]:
+            ids.update(postings)
+        return ids
+
+    def match(self, name, k=5, min_score=0.3):
+        '''
+        返回与 name 最接近的 k 个学校 [(score, 中文名, 英文名, 命中的别名), ...]
+        同一学校只保留得分最高的别名
+        '''
+        query = normalize(name, t2s=True)
+        grams = ngrams(query)
+        best = {}
+        for i in self.candidates(grams):
+            score = 2 * len(grams & self.grams[i]) / (len(grams) + len(self.grams[i]))
+            school = self.schools[i]
+            if score >= min_score and score > best.get(school, (0, None))[0]:
+                best[school] = (score, self.aliases[i])
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))[:k]
+        return [(round(score, 4), school, self.en.get(school, ''), alias) for school, (score, alias) in ranked]
+
+def unmatched_names(store=None, index=None):
+    '''与 school.py 相同的规则找出未收录的学校名，返回 {规范化名称: 出现次数}'''
+    index = index or load_index()
+    zh_en, en_zh = index['zh_en'], index['en_zh']
+    store = store or open_store()
+    counts = Counter()
+    for contest in store.contests:
+        if 'School' in store.info(contest)['columns']:
+            for school in store.contest(contest)['name']:
+                if school not in zh_en and school not in en_zh:
+                    counts[school] += 1
+    return counts
+
+def write_candidates(path, names, matcher, k=3):
+    '''
+    写出候选表，每个未收录名称对应至多 k 行候选
+    人工审核后在 accept 列填 y，再用 --merge 合并回 school.csv
+    '''
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CANDIDATE_COLUMNS)
+        for name, count in sorted(names.items(), key=lambda item: (-item[1], item[0])):
+            matches = matcher.match(name, k)
+            if not matches:
+                writer.writerow([name, count, '', '', '', '', '', ''])
+            for rank, (score, school, en, alias) in enumerate(matches, 1):
+                writer.writerow([name, count, rank, score, school, en, alias, ''])
+
+def merge_candidates(path, school_csv=SCHOOL_CSV):
+    '''
+    将候选表中 accept 为 y 的名称作为别名追加到 school.csv 对应学校的 alt 列
+    只改写涉及的行，其余行保持原样；返回 (合并数, 找不到学校的名称列表)
+    '''
+    accepted = {}
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            if row['accept'].strip().lower() in ('y', 'yes', '1') and row['school']:
+                accepted.setdefault(row['school'], []).append(row['name'])
+
+    with open(school_csv, 'r', encoding='utf-8', newline='') as f:
+        text = f.read()
+    lines = text.split('\n')
+    merged, found, updated = 0, set(), {}
+    for i, line in enumerate(lines[1:], 1):
+        row = next(csv.reader([line]), [])
+        if not row or normalize(row[0]) not in accepted:
+            continue
+        zh = normalize(row[0])
+        found.add(zh)
+        row = (row + ['', ''])[:3]
+        alts = [alt.strip() for alt in row[2].split(',') if alt.strip()]
+        known = {normalize(alt) for alt in alts}
+        for name in accepted[zh]:
+            if name not in known:
+                alts.append(name)
+                known.add(name)
+                merged += 1
+        # 英文名等字段可能含逗号，按 CSV 规则转义
+        updated[i] = [row[0], row[1], ','.join(alts)]
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='').writerow(updated[i])
+        lines[i] = buffer.getvalue()
+
+    tmp_path = school_csv + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write('\n'.join(lines))
+    # 重新读取写出的文件：改写的行应与合并后的字段一致，其余行与原文件逐行相同
+    with open(tmp_path, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    expected = list(csv.reader(io.StringIO(text)))
+    for i in updated:
+        expected[i] = updated[i]
+    if rows != expected:
+        os.remove(tmp_path)
+        raise AssertionError(f"合并后的 {school_csv} 与预期不一致，未写入")
+    os.replace(tmp_path, school_csv)
+    return merged, sorted(set(accepted) - found)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='为未收录的学校名推荐 school.csv 中的候选学校')
+    parser.add_argument('-k', type=int, default=3, help='每个名称的候选数')
+    parser.add_argument('--output', default=CANDIDATES_PATH, help='候选表路径')
+    parser.add_argument('--merge', metavar='PATH', help='将审核后的候选表合并回 school.csv')
+    parser.add_argument('--query', help='只查询单个名称')
+    args = parser.parse_args()
+
+    if args.merge:
+        merged, missing = merge_candidates(args.merge)
+        print(f"已向 {SCHOOL_CSV} 合并 {merged} 个别名")
+        for school in missing:
+            print(f"  未找到学校: {school}")
+    elif args.query:
+        for score, school, en, alias in SchoolMatcher().match(args.query, args.k):
+            print(f"{score:.3f}  {school}  {en}  ({alias})")
+    else:
+        names = unmatched_names()
+        write_candidates(args.output, names, SchoolMatcher(), args.k)
+        print(f"{len(names)} 个未收录的学校名，候选已写入 {args.output}")
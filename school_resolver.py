@@ -0,0 +1,120 @@
+import csv
+import os
+import re
+import pickle
+import hashlib
+from functools import lru_cache
+
+SCHOOL_CSV = 'school.csv'
+INDEX_PATH = 'school_index.pkl'
+INDEX_VERSION = 1
+
+_pattern = re.compile('[^\u4e00-\u9fa5a-zA-Z0-9]')
+_converter = None
+_index = None
+_index_stat = None
+
+def convert_t2s(s):
+    '''繁体转简体，整个进程共用一个 OpenCC 实例'''
+    global _converter
+    if _converter is None:
+        from opencc import OpenCC
+        _converter = OpenCC('t2s')
+    return _converter.convert(s)
+
+@lru_cache(maxsize=65536)
+def _normalize(s, to_simplified):
+    s = _pattern.sub('', s)
+    s = s.lower()
+    if to_simplified or '港' in s or '澳' in s:
+        s = convert_t2s(s)
+    return s
+
+def normalize(s, t2s=False):
+    '''去除标点空白、转小写，含港/澳时转为简体'''
+    return _normalize(str(s), t2s)
+
+def build_index(path=SCHOOL_CSV):
+    '''
+    由 school.csv 构建别名索引
+    zh_en: 中文名及中文别名 -> 英文名
+    en_zh: 英文名及英文别名 -> 中文名
+    alt_zh: 英文名及所有别名 -> 中文名
+    '''
+    zh_en, en_zh, alt_zh = {}, {}, {}
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            row = (row + ['', '', ''])[:3]
+            if not any(row):
+                continue
+            # 与 pandas 读取空值后 str(nan) 的结果保持一致
+            zh = normalize(row[0] or 'nan')
+            en = normalize(row[1] or 'nan')
+            alts = [normalize(alt.strip()) for alt in row[2].split(',') if alt.strip()]
+            zh_en[zh] = en
+            en_zh[en] = zh
+            alt_zh[en] = zh
+            for alt in alts:
+                alt_zh[alt] = zh
+                if alt.encode('utf-8').isalpha():
+                    en_zh[alt] = zh
+                else:
+                    zh_en[alt] = en
+    return {'zh_en': zh_en, 'en_zh': en_zh, 'alt_zh': alt_zh}
+
+def load_index(path=SCHOOL_CSV, cache_path=INDEX_PATH):
+    '''
+    读取别名索引，school.csv 未变化时直接使用磁盘上的缓存
+    本进程已加载过且 school.csv 的 (路径, 修改时间, 大小) 未变时不再读取和哈希文件
+    '''
+    global _index, _index_stat
+    st = os.stat(path)
+    stat = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    if _index is not None and _index_stat == stat:
+        return _index
+    with open(path, 'rb') as f:
+        key = (INDEX_VERSION, hashlib.sha1(f.read()).hexdigest())
+    if _index is not None and _index['key'] == key:
+        _index_stat = stat
+        return _index
+    if cache_path is not None and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('key') == key:
+                _index, _index_stat = cached, stat
+                return _index
+        except Exception:
+            pass
+    _index = build_index(path)
+    _index['key'] = key
+    _index_stat = stat
+    if cache_path is not None:
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(_index, f)
+        os.replace(tmp_path, cache_path)
+    return _index
+
+def cached_index():
+    '''本进程已加载的别名索引，尚未加载时读取一次；之后不再检查 school.csv 是否变化'''
+    return _index if _index is not None else load_index()
+
+def getSchool(s):
+    '''将学校名称解析为规范的中文名（已规范化），未收录时返回规范化后的原名'''
+    s = normalize(s)
+    return cached_index()['alt_zh'].get(s, s)
+
+def resolve_column(column):
+    '''
+    对一整列学校名称做解析，只对不同的取值各计算一次
+    column: pandas.Series
+    '''
+    alt_zh = cached_index()['alt_zh']
+    mapping = {}
+    for value in column.unique():
+        s = normalize(value)
+        mapping[value] = alt_zh.get(s, s)
+    return column.map(mapping)
@@ -0,0 +1,250 @@
+import os
+import sys
+import glob
+import fnmatch
+import time
+import argparse
+import subprocess
+from contest_meta import parse_name, parse_rl_filename
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_rl_workbooks = {}
+
+def is_rl_workbook(path):
+    '''有 Official 工作表的 RankLand 榜单（由 rl.py 转换）；按 (修改时间, 大小) 缓存结果，已删除的文件返回 False'''
+    if not path.endswith('.xlsx'):
+        return False
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    key = (path, st.st_mtime_ns, st.st_size)
+    if key not in _rl_workbooks:
+        from openpyxl import load_workbook
+        try:
+            workbook = load_workbook(path, read_only=True)
+            _rl_workbooks[key] = 'Official' in workbook.sheetnames
+            workbook.close()
+        except Exception:
+            # 无法打开的文件交给 convert 阶段报告错误
+            _rl_workbooks[key] = False
+    return _rl_workbooks[key]
+
+# 各阶段的输入、输出及上游阶段；输入变化或上游阶段运行过时，该阶段需要重新运行
+# select 为可选的过滤条件，只有满足条件的输入文件才属于该阶段
+STAGES = {
+    'convert': {'inputs': ['org/*.xlsx', 'org/*.csv'], 'outputs': ['csv'], 'deps': [],
+                'select': lambda path: not is_rl_workbook(path)},
+    'rl': {'inputs': ['org/*.xlsx'], 'outputs': ['csv'], 'deps': [], 'select': is_rl_workbook},
+    'qoj': {'inputs': ['org/*.htm'], 'outputs': ['csv'], 'deps': []},
+    'store': {'inputs': ['csv/*.csv', 'school.csv'], 'outputs': [], 'deps': ['convert', 'rl', 'qoj']},
+    'schools': {'inputs': ['school.csv'], 'outputs': [], 'deps': ['store']},
+    'rating': {'inputs': ['date.csv'], 'outputs': ['rating'], 'deps': ['store']},
+    'readme': {'inputs': ['date.csv'], 'outputs': ['README.md'], 'deps': ['store']},
+    'analytics': {'inputs': [], 'outputs': [], 'deps': ['store']},
+}
+
+def snapshot():
+    '''所有输入文件的 {路径: (修改时间, 大小)}'''
+    files = {}
+    for stage in STAGES.values():
+        for pattern in stage['inputs']:
+            for path in glob.glob(pattern):
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files[path] = (st.st_mtime_ns, st.st_size)
+    return files
+
+def changed_paths(old, new):
+    return {path for path in old.keys() | new.keys() if old.get(path) != new.get(path)}
+
+def topological_order():
+    order, seen = [], set()
+    def visit(name):
+        if name not in seen:
+            seen.add(name)
+            for dep in STAGES[name]['deps']:
+                visit(dep)
+            order.append(name)
+    for name in STAGES:
+        visit(name)
+    return order
+
+def dirty_stages(paths, retry=()):
+    '''由变化的文件及需要重试的阶段得到需要运行的阶段（含下游），按依赖顺序排列'''
+    dirty = {name for name, stage in STAGES.items()
+             if any(fnmatch.fnmatch(path, pattern) and stage.get('select', bool)(path)
+                    for path in paths for pattern in stage['inputs'])} | set(retry)
+    result = []
+    for name in topological_order():
+        if name in dirty or any(dep in result for dep in STAGES[name]['deps']):
+            result.append(name)
+    return result
+
+def run_script(*args, cwd=ROOT):
+    '''以子进程运行脚本，返回是否成功'''
+    result = subprocess.run([sys.executable, *args], cwd=cwd)
+    return result.returncode == 0
+
+def check_failures(failed):
+    '''阶段中有脚本失败时抛出异常，使该阶段记为失败'''
+    if failed:
+        raise RuntimeError(f"{len(failed)} 个文件处理失败: {', '.join(failed)}")
+
+def run_convert(paths):
+    from convert import convert_all
+    # RankLand 榜单由 rl 阶段处理
+    rl_files = [f for f in os.listdir('org') if is_rl_workbook(os.path.join('org', f))]
+    converted, skipped, errors = convert_all(exclude=rl_files)
+    print(f"  转换 {len(converted)} 个文件，跳过 {len(skipped)} 个，失败 {len(errors)} 个")
+    for file in sorted(errors):
+        if os.path.join('org', file) in paths:
+            print(f"  {file}: {errors[file]}")
+
+def run_rl(paths):
+    # 按 RankLand 文件名确定比赛名，流式转换到 csv/{届数}_{ICPC|CCPC}_{城市}.csv
+    # rl.py 的输出是未整理的原始榜单（含空的 Medal 列及非正式队伍），csv/ 中已有的榜单经过人工整理，不覆盖
+    failed = []
+    for path in sorted(p for p in paths if is_rl_workbook(p)):
+        try:
+            season, contest_type, city = parse_rl_filename(os.path.basename(path))
+        except AssertionError as e:
+            print(f"  跳过: {e}")
+            continue
+        name = f'{season}_{contest_type}_{city}'
+        output = os.path.join(ROOT, 'csv', f'{name}.csv')
+        if os.path.exists(output):
+            print(f"  跳过: csv/{name}.csv 已存在（人工整理过的榜单），需要更新时手动运行 rl.py 并整理")
+            continue
+        if not run_script(os.path.join(ROOT, 'rl.py'), os.path.abspath(path)[:-len('.xlsx')], '--stream', f'--output={output}'):
+            failed.append(path)
+            continue
+        print(f"  {path} -> csv/{name}.csv")
+    check_failures(failed)
+
+def run_qoj(paths):
+    # 只处理已按 {届数}_{ICPC|CCPC}_{城市}.htm 命名的页面
+    failed = []
+    for path in sorted(p for p in paths if p.endswith('.htm') and os.path.exists(p)):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if parse_name(name) is None:
+            print(f"  跳过无法确定比赛名的页面: {path}")
+            continue
+        if not run_script(os.path.join(ROOT, 'qoj.py'), os.path.abspath(path), '--stream', cwd=os.path.join(ROOT, 'csv')):
+            failed.append(path)
+            continue
+        print(f"  {path} -> csv/{name}.csv")
+    check_failures(failed)
+
+def run_store(paths):
+    from contest_store import build_store
+    store = build_store()
+    print(f"  比赛存储: {len(store.contests)} 场比赛")
+    # 按 schema 检查不合格、未进入存储的行
+    for contest in store.contests:
+        for error in store.info(contest).get('errors', []):
+            print(f"  {error}")
+
+def run_schools(paths):
+    from school_match import unmatched_names
+    names = unmatched_names()
+    print(f"  {len(names)} 个未收录的学校名（运行 school_match.py 生成候选表）")
+
+def run_analytics(paths):
+    from analytics import build_analytics
+    tables = build_analytics()
+    print(f"  统计表: {len(tables['problems'])} 道题目, {len(tables['schools'])} 条学校记录")
+
+def run_rating(paths):
+    if not run_script(os.path.join('rating', 'rating_school.py')):
+        raise RuntimeError("rating_school.py 运行失败")
+
+def run_readme(paths):
+    if not run_script('readme.py'):
+        raise RuntimeError("readme.py 运行失败")
+
+RUNNERS = {
+    'convert': run_convert,
+    'rl': run_rl,
+    'qoj': run_qoj,
+    'store': run_store,
+    'schools': run_schools,
+    'rating': run_rating,
+    'readme': run_readme,
+    'analytics': run_analytics,
+}
+
+def run_stages(stages, paths):
+    '''
+    按顺序运行各阶段，上游阶段失败时跳过下游阶段，避免在过期的输入上运行
+    返回失败及被跳过的阶段
+    '''
+    failed = set()
+    for name in stages:
+        print(f"[{time.strftime('%H:%M:%S')}] {name}")
+        if any(dep in failed for dep in STAGES[name]['deps']):
+            print(f"  跳过: 上游阶段 {', '.join(d for d in STAGES[name]['deps'] if d in failed)} 失败")
+            failed.add(name)
+            continue
+        start = time.perf_counter()
+        try:
+            RUNNERS[name](paths)
+        except Exception as e:
+            # 单个阶段失败不影响监视，下次变化时重试
+            print(f"  {name} 失败: {type(e).__name__}: {e}")
+            failed.add(name)
+        print(f"  用时 {time.perf_counter() - start:.1f}s")
+    return failed
+
+def watch(interval=2.0, debounce=5.0):
+    '''
+    轮询输入文件，检测到变化后等待 debounce 秒内不再有新变化，再一次性运行受影响的阶段
+    阶段自身写出的文件（如 csv/）不会再次触发运行
+    '''
+    current = snapshot()
+    print(f"监视 {len(current)} 个文件，每 {interval}s 检查一次")
+    # 失败的阶段及其输入，下次有文件变化时一并重试
+    retry, retry_paths = set(), set()
+    while True:
+        time.sleep(interval)
+        new = snapshot()
+        paths = changed_paths(current, new)
+        if not paths:
+            continue
+        # 去抖：一批文件陆续写入时，等到不再变化后再处理
+        while True:
+            time.sleep(debounce)
+            latest = snapshot()
+            if not changed_paths(new, latest):
+                break
+            paths |= changed_paths(new, latest)
+            new = latest
+        stages = dirty_stages(paths, retry)
+        print(f"{len(paths)} 个文件变化，运行: {', '.join(stages)}")
+        failed = run_stages(stages, paths | retry_paths)
+        retry, retry_paths = failed, (paths | retry_paths) if failed else set()
+        # 各阶段写出的文件计入基准，其余输入沿用运行前的状态，运行期间新放入的文件下次仍会被处理
+        after = snapshot()
+        outputs = [p for name in stages for p in STAGES[name]['outputs']]
+        current = {path: (after if any(path.startswith(p) for p in outputs) else new).get(path)
+                   for path in new.keys() | after.keys()}
+        current = {path: stat for path, stat in current.items() if stat is not None}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='监视 org/ 等输入，自动运行受影响的处理阶段')
+    parser.add_argument('--interval', type=float, default=2.0, help='轮询间隔（秒）')
+    parser.add_argument('--debounce', type=float, default=5.0, help='最后一次变化后等待的时间（秒）')
+    parser.add_argument('--once', action='store_true', help='运行所有阶段一次后退出')
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    if args.once:
+        sys.exit(1 if run_stages(topological_order(), set(snapshot())) else 0)
+    else:
+        try:
+            watch(args.interval, args.debounce)
+        except KeyboardInterrupt:
+            pass
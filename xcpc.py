@@ -0,0 +1,83 @@
+import os
+import sys
+import argparse
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# 各子命令只在运行时导入所需的模块：pandas、tqdm 等只有 convert/rate 会用到，
+# check-schools/readme 只读取预编译的数据包（bundle.py），不导入 numpy/pandas
+
+def cmd_convert(args):
+    from convert import convert_all
+    converted, skipped, errors = convert_all(jobs=args.jobs, force=args.force)
+    print(f"转换 {len(converted)} 个文件，跳过未变化的 {len(skipped)} 个文件，失败 {len(errors)} 个文件")
+    if errors:
+        print("失败列表:")
+        for file in sorted(errors):
+            print(f"  {file}: {errors[file]}")
+        return 1
+    return 0
+
+def cmd_check_schools(args):
+    from bundle import load_bundle
+    from school import print_unknown
+    notfound = load_bundle()['unknown_schools']
+    print_unknown(notfound)
+    return 1 if notfound and args.strict else 0
+
+def cmd_rate(args):
+    import runpy
+    argv = [os.path.join('rating', 'rating_school.py')]
+    if args.full:
+        argv.append('--full')
+    if args.csv:
+        argv.append('--csv')
+    if args.entities:
+        argv.append(f'--entities={args.entities}')
+    sys.argv = argv
+    sys.path.insert(0, os.path.join(ROOT, 'rating'))
+    runpy.run_path(argv[0], run_name='__main__')
+    return 0
+
+def cmd_readme(args):
+    from bundle import load_bundle
+    from instrument import begin
+    from readme import readme_data, render_readme, write_readme
+    bundle = load_bundle()
+    scan = begin('readme_scan')
+    data = readme_data(bundle['catalog'], bundle['contests'])
+    content = render_readme(data)
+    scan.end(rows=len(data))
+    if write_readme(content):
+        print("README.md 已更新")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='xcpc', description='ICPC/CCPC 终榜数据处理')
+    commands = parser.add_subparsers(dest='command', required=True, metavar='command')
+
+    p = commands.add_parser('convert', help='将 org 下的榜单转换为 csv')
+    p.add_argument('-j', '--jobs', type=int, default=None, help='并行进程数（默认为CPU核数，1为串行）')
+    p.add_argument('--force', action='store_true', help='忽略转换清单，重新转换所有文件')
+    p.set_defaults(func=cmd_convert)
+
+    p = commands.add_parser('check-schools', help='列出 school.csv 中未收录的学校名')
+    p.add_argument('--strict', action='store_true', help='有未收录的学校名时以状态码 1 退出')
+    p.set_defaults(func=cmd_check_schools)
+
+    p = commands.add_parser('rate', help='计算学校、队伍、队员的rating（rating/rating_school.py）')
+    p.add_argument('--full', action='store_true', help='忽略快照，从头计算')
+    p.add_argument('--csv', action='store_true', help='额外导出学校宽表 rating_school.csv')
+    p.add_argument('--entities', default=None, help='要计算的实体类型，逗号分隔，默认为全部')
+    p.set_defaults(func=cmd_rate)
+
+    p = commands.add_parser('readme', help='生成 README.md 的数据完整性表格')
+    p.set_defaults(func=cmd_readme)
+    return parser
+
+if __name__ == '__main__':
+    args = build_parser().parse_args()
+    # 与各脚本一致，路径均相对于仓库根目录
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    sys.exit(args.func(args))